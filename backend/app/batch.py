@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.runnables import RunnableLambda
+
+from . import cache, embeddings, schemas
+from .pipeline import get_reconnaissance, save_audit
+from .ratelimit import GitHubRateLimited
+from .llm_output import LLMOutputError
+from .service import (
+    LLM_MAX_ATTEMPTS, build_prompt_inputs, generate_audit_report, get_audit_chain, llm_failure,
+    message_text, parse_audit_response, record_llm_call,
+)
+from .utils import require_repo, resolve_head
+
+logger = logging.getLogger(__name__)
+
+# Repos reconnoitred at once, and LLM calls in flight at once, per batch
+BATCH_RECON_CONCURRENCY = int(os.getenv("BATCH_RECON_CONCURRENCY", "8"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+@dataclass
+class _Candidate:
+    index: int
+    repo_url: str
+    owner: str = ""
+    repo: str = ""
+    commit_sha: str = ""
+    metadata: Optional[dict] = None
+    audit: Optional[schemas.AuditResponse] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+    cached: bool = False
+    similarity: Optional[float] = None
+    skipped: bool = False
+
+def _event(candidate: _Candidate) -> str:
+    if candidate.error:
+        status = "failed"
+    elif candidate.skipped:
+        status = "skipped"
+    else:
+        status = "cached" if candidate.cached else "completed"
+    item = schemas.BatchAuditItem(
+        index=candidate.index,
+        repo_url=candidate.repo_url,
+        status=status,
+        similarity=candidate.similarity,
+        audit=candidate.audit,
+        error=candidate.error,
+        error_status=candidate.error_status,
+    )
+    return json.dumps({"event": "result", **item.model_dump(mode="json")}) + "\n"
+
+def _fail(candidate: _Candidate, exc: Exception):
+    if isinstance(exc, HTTPException):
+        candidate.error, candidate.error_status = str(exc.detail), exc.status_code
+    elif isinstance(exc, GitHubRateLimited):
+        candidate.error, candidate.error_status = str(exc), 429
+    else:
+        logger.exception("Batch audit of %s crashed", candidate.repo_url, exc_info=exc)
+        candidate.error, candidate.error_status = "Internal error while auditing.", 500
+
+def prerank(candidates: List[_Candidate], jd: str, top_k: Optional[int],
+            min_similarity: Optional[float]) -> Tuple[List[_Candidate], List[_Candidate]]:
+    """
+    Splits reconnoitred candidates into (kept, skipped) by similarity of README + tech
+    stack with the JD (embeddings.py; IDF over this batch, so terms every candidate
+    shares count for little). Kept candidates are ordered most similar first.
+    """
+    matrix = np.stack([
+        embeddings.embed_repo(c.metadata["readme_content"], c.metadata["tech_stack"]) for c in candidates
+    ])
+    scores = embeddings.similarities(matrix, embeddings.embed_text(jd))
+    for candidate, score in zip(candidates, scores):
+        candidate.similarity = round(float(score), 4)
+    kept = [candidates[i] for i in embeddings.select_top(scores, top_k, min_similarity)]
+    skipped = [c for c in candidates if c not in kept]
+    for candidate in skipped:
+        candidate.skipped = True
+    return kept, skipped
+
+def rank_shortlist(candidates: List[_Candidate], has_jd: bool) -> List[schemas.ShortlistEntry]:
+    """Best match first (engineering score breaks ties); without a JD, engineering score alone."""
+    audited = [c for c in candidates if c.audit]
+
+    def sort_key(c: _Candidate):
+        match = c.audit.match_score if has_jd and c.audit.match_score is not None else -1.0
+        return (match, c.audit.engineering_score)
+
+    audited.sort(key=sort_key, reverse=True)
+    return [
+        schemas.ShortlistEntry(
+            rank=rank,
+            repo_url=c.repo_url,
+            audit_id=c.audit.id,
+            engineering_score=c.audit.engineering_score,
+            match_score=c.audit.match_score,
+            verdict=c.audit.verdict,
+        )
+        for rank, c in enumerate(audited, start=1)
+    ]
+
+async def run_batch(req: schemas.BatchAuditRequest) -> AsyncIterator[str]:
+    """
+    Screens many repos against one JD, yielding NDJSON lines.
+    1. Reconnaissance for every repo, BATCH_RECON_CONCURRENCY at a time. Cached
+       verdicts and failures are streamed as soon as they are known.
+    2. With prerank_top_k / prerank_min_similarity (and a JD), those repos are
+       ranked by vector similarity to the JD and only the promising ones continue;
+       the rest are streamed as "skipped" without an LLM call.
+    3. Every repo still needing a verdict goes through ONE chain via
+       abatch_as_completed, so results stream back in completion order.
+    4. A final "shortlist" event ranks everything that was audited.
+    """
+    jd = req.job_description
+    jd_hash = cache.hash_job_description(jd)
+
+    # Duplicate URLs in the request are audited once
+    candidates: Dict[str, _Candidate] = {}
+    for url in req.repo_urls:
+        url = str(url)
+        if url not in candidates:
+            candidates[url] = _Candidate(index=len(candidates), repo_url=url)
+
+    semaphore = asyncio.Semaphore(BATCH_RECON_CONCURRENCY)
+
+    async def reconnoitre(candidate: _Candidate) -> _Candidate:
+        async with semaphore:
+            try:
+                candidate.owner, candidate.repo = require_repo(candidate.repo_url)
+                _branch, candidate.commit_sha = await resolve_head(candidate.owner, candidate.repo)
+                if not req.force_reaudit:
+                    candidate.audit = await cache.get_verdict(
+                        candidate.owner, candidate.repo, candidate.commit_sha, jd_hash
+                    )
+                    candidate.cached = candidate.audit is not None
+                if not candidate.cached:
+                    candidate.metadata = await get_reconnaissance(
+                        candidate.repo_url, candidate.owner, candidate.repo, candidate.commit_sha
+                    )
+            except Exception as e:
+                _fail(candidate, e)
+        return candidate
+
+    pending: List[_Candidate] = []
+    for finished in asyncio.as_completed([reconnoitre(c) for c in candidates.values()]):
+        candidate = await finished
+        if candidate.metadata is not None and not candidate.error:
+            pending.append(candidate)
+        else:
+            yield _event(candidate)
+
+    if pending and jd and (req.prerank_top_k or req.prerank_min_similarity is not None):
+        pending, skipped = await run_in_threadpool(prerank, pending, jd, req.prerank_top_k, req.prerank_min_similarity)
+        for candidate in skipped:
+            yield _event(candidate)
+
+    if pending:
+        chain = get_audit_chain()
+        inputs = [build_prompt_inputs(c.metadata, jd) for c in pending]
+
+        async def timed(prompt_inputs: dict) -> Tuple[object, float]:
+            # Timed per item, inside the concurrency limit, so queueing behind other repos isn't counted
+            start = time.perf_counter()
+            message = await chain.ainvoke(prompt_inputs)
+            return message, time.perf_counter() - start
+
+        async for i, output in RunnableLambda(timed).abatch_as_completed(
+            inputs, config={"max_concurrency": BATCH_LLM_CONCURRENCY}, return_exceptions=True
+        ):
+            candidate = pending[i]
+            try:
+                if isinstance(output, Exception):
+                    raise output
+                output, seconds = output
+                record_llm_call(inputs[i], output, seconds, mode="batch")
+                try:
+                    llm_result = parse_audit_response(message_text(output))
+                except LLMOutputError as e:
+                    if LLM_MAX_ATTEMPTS < 2:
+                        raise llm_failure(e)
+                    # Retry just this repo's LLM step with its already-fetched reconnaissance
+                    llm_result = await run_in_threadpool(generate_audit_report, candidate.metadata, jd, LLM_MAX_ATTEMPTS - 1)
+                candidate.audit = await save_audit(
+                    candidate.repo_url, jd, candidate.metadata, llm_result,
+                    candidate.owner, candidate.repo, candidate.commit_sha, jd_hash,
+                )
+            except Exception as e:
+                if not isinstance(e, (HTTPException, GitHubRateLimited)):
+                    e = llm_failure(e)
+                _fail(candidate, e)
+            yield _event(candidate)
+
+    ordered = list(candidates.values())
+    shortlist = schemas.BatchShortlist(
+        shortlist=rank_shortlist(ordered, has_jd=bool(jd)),
+        failed=[c.repo_url for c in ordered if c.error],
+        skipped=[c.repo_url for c in ordered if c.skipped],
+    )
+    yield json.dumps({"event": "shortlist", **shortlist.model_dump(mode="json")}) + "\n"
@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from . import crud_async, metrics, schemas
+from .database import AsyncSessionLocal
+from .utils import resolve_head
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError: # Optional: only needed for SHARED_CACHE_URL=redis://...
+    redis_asyncio = None
+
+RECON_CACHE_SIZE = int(os.getenv("RECON_CACHE_SIZE", "512"))
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "2048"))
+# Seconds a resolved (branch, HEAD sha) answers the cached-verdict fast path; 0 = always ask GitHub
+HEAD_CACHE_SECONDS = float(os.getenv("HEAD_CACHE_SECONDS", "30"))
+
+# Cache shared by every worker process: sqlite:////path/file.db or redis://host:port/db. Unset = per-process only.
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "100000"))
+
+class LRUCache:
+    """Small thread-safe in-process LRU that sits in front of the persistent tables."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class SQLiteSharedCache:
+    """
+    Cross-process cache in a local SQLite file (WAL + mmap), for several workers on one host.
+    Values are JSON strings; once over max_entries the oldest writes are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = SHARED_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local() # sqlite3 connections are per thread
+        self._puts = 0
+        # Throwaway connection: one opened here could leak into forked workers
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_stored_at ON cache (stored_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _put(self, key: str, value: str):
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)", (key, value, time.time()))
+        self._puts += 1
+        if self._puts % 1000 == 0: # Evict in bulk now and then rather than on every write
+            conn.execute(
+                "DELETE FROM cache WHERE stored_at < (SELECT stored_at FROM cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, value: str):
+        await asyncio.to_thread(self._put, key, value)
+
+class RedisSharedCache:
+    """Cross-process (and cross-host) cache in Redis or any Redis-compatible store."""
+
+    def __init__(self, url: str):
+        if redis_asyncio is None:
+            raise ValueError("SHARED_CACHE_URL points at Redis but the 'redis' package is not installed.")
+        self.url = url
+        self._clients = {} # One client per event loop, like github.get_client()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients[loop] = redis_asyncio.from_url(self.url, decode_responses=True)
+        return self._clients[loop]
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client().get(key)
+
+    async def put(self, key: str, value: str):
+        await self._client().set(key, value)
+
+def make_shared_cache(url: str):
+    """SHARED_CACHE_URL -> shared cache backend, or None for per-process caching only."""
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == "sqlite":
+        return SQLiteSharedCache(url[len("sqlite:///"):])
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisSharedCache(url)
+    raise ValueError(f"Unsupported SHARED_CACHE_URL scheme '{scheme}'.")
+
+# Lookups go: per-process LRU -> shared cache (if configured) -> database
+recon_cache = LRUCache(RECON_CACHE_SIZE)
+verdict_cache = LRUCache(VERDICT_CACHE_SIZE)
+head_cache = LRUCache(VERDICT_CACHE_SIZE)
+shared_cache = make_shared_cache(SHARED_CACHE_URL)
+
+def _shared_key(namespace: str, key: tuple) -> str:
+    return f"spartan:{namespace}:" + "/".join(key)
+
+async def _shared_get(namespace: str, key: tuple) -> Optional[str]:
+    if shared_cache is None:
+        return None
+    return await shared_cache.get(_shared_key(namespace, key))
+
+async def _shared_put(namespace: str, key: tuple, value: str):
+    if shared_cache is not None:
+        await shared_cache.put(_shared_key(namespace, key), value)
+
+def hash_job_description(jd: Optional[str]) -> str:
+    """Stable key for a JD; whitespace-only differences don't bust the cache."""
+    normalized = " ".join((jd or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def repo_key(owner: str, repo: str):
+    # GitHub owner/repo names are case-insensitive
+    return owner.lower(), repo.lower()
+
+# --- HEAD (owner, repo) -> (branch, sha), in-process with a TTL ---
+
+async def get_head(owner: str, repo: str):
+    """
+    resolve_head, reused for HEAD_CACHE_SECONDS. A push inside that window is only
+    seen early if its webhook reached this process (put_head).
+    """
+    key = repo_key(owner, repo)
+    cached = head_cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        metrics.cache_lookups.inc(cache="head", result="lru")
+        return cached[1]
+    metrics.cache_lookups.inc(cache="head", result="miss")
+    branch, sha = await resolve_head(owner, repo)
+    put_head(owner, repo, branch, sha)
+    return branch, sha
+
+def put_head(owner: str, repo: str, branch: str, sha: str):
+    if HEAD_CACHE_SECONDS > 0:
+        head_cache.put(repo_key(owner, repo), (time.monotonic() + HEAD_CACHE_SECONDS, (branch, sha)))
+
+# --- Reconnaissance (owner, repo, sha) ---
+
+async def get_recon(owner: str, repo: str, sha: str) -> Optional[dict]:
+    key = (*repo_key(owner, repo), sha)
+    payload = recon_cache.get(key)
+    if payload is not None:
+        metrics.cache_lookups.inc(cache="recon", result="lru")
+        return payload
+    shared = await _shared_get("recon", key)
+    if shared is not None:
+        metrics.cache_lookups.inc(cache="recon", result="shared")
+        payload = json.loads(shared)
+        recon_cache.put(key, payload)
+        return payload
+    async with AsyncSessionLocal() as db:
+        snapshot = await crud_async.get_recon_snapshot(db, *key)
+        payload = snapshot.payload if snapshot else None
+    metrics.cache_lookups.inc(cache="recon", result="db" if payload is not None else "miss")
+    if payload is not None:
+        recon_cache.put(key, payload)
+        await _shared_put("recon", key, json.dumps(payload))
+    return payload
+
+async def put_recon(owner: str, repo: str, sha: str, payload: dict):
+    key = (*repo_key(owner, repo), sha)
+    recon_cache.put(key, payload)
+    await _shared_put("recon", key, json.dumps(payload))
+    async with AsyncSessionLocal() as db:
+        await crud_async.create_recon_snapshot(db, *key, payload=payload)
+
+# --- Verdicts (owner, repo, sha, jd_hash[, "deep"]) ---
+
+def verdict_key(owner: str, repo: str, sha: str, jd_hash: str, deep: bool = False) -> tuple:
+    # Deep and shallow verdicts for the same commit + JD are scored on different inputs
+    return (*repo_key(owner, repo), sha, jd_hash, *(("deep",) if deep else ()))
+
+async def get_verdict(owner: str, repo: str, sha: str, jd_hash: str, deep: bool = False) -> Optional[schemas.AuditResponse]:
+    key = verdict_key(owner, repo, sha, jd_hash, deep)
+    cached = verdict_cache.get(key)
+    if cached is not None:
+        metrics.cache_lookups.inc(cache="verdict", result="lru")
+        return cached
+    shared = await _shared_get("verdict", key)
+    if shared is not None:
+        metrics.cache_lookups.inc(cache="verdict", result="shared")
+        cached = schemas.AuditResponse.model_validate_json(shared)
+        verdict_cache.put(key, cached)
+        return cached
+    async with AsyncSessionLocal() as db:
+        audit = await crud_async.get_audit_by_commit(db, *key[:4], deep=deep)
+        cached = schemas.AuditResponse.model_validate(audit) if audit else None
+    metrics.cache_lookups.inc(cache="verdict", result="db" if cached is not None else "miss")
+    if cached is not None:
+        verdict_cache.put(key, cached)
+        await _shared_put("verdict", key, cached.model_dump_json())
+    return cached
+
+async def put_verdict(audit: schemas.AuditResponse, owner: str, repo: str, sha: str, jd_hash: str, deep: bool = False):
+    key = verdict_key(owner, repo, sha, jd_hash, deep)
+    verdict_cache.put(key, audit)
+    await _shared_put("verdict", key, audit.model_dump_json())
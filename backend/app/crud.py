@@ -1,23 +1,246 @@
+import json
+import base64
+import hashlib
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from . import models, schemas
+from sqlalchemy import desc, exists, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from . import embeddings, models, schemas, search
 
-def get_audit_by_url(db: Session, repo_url: str):
-    """Fetches an existing audit record from the DB by its repo URL."""
-    return db.query(models.Audit).filter(models.Audit.repo_url == repo_url).first()
+# --- STATEMENTS ---
+# Built once here and executed by crud_async (AsyncSession) and by the few sync
+# helpers scripts and the gunicorn master still use, so the two never drift apart.
 
-def get_audit(db: Session, audit_id: int):
-    """Fetches a single audit record from the DB by its ID."""
-    return db.query(models.Audit).filter(models.Audit.id == audit_id).first()
+def _valid_at_commit(repo_owner: str, repo_name: str, commit_sha: str):
+    """Audits of a repo made at the commit, or carried onto it by a push (see CarriedVerdict)."""
+    carried = select(models.CarriedVerdict.audit_id).where(
+        models.CarriedVerdict.repo_owner == repo_owner,
+        models.CarriedVerdict.repo_name == repo_name,
+        models.CarriedVerdict.commit_sha == commit_sha,
+    )
+    return (
+        models.Audit.repo_owner == repo_owner,
+        models.Audit.repo_name == repo_name,
+        or_(models.Audit.commit_sha == commit_sha, models.Audit.id.in_(carried)),
+    )
 
-def get_audits(db: Session, skip: int = 0, limit: int = 100):
-    """Fetches a list of all audits, ordered by the most recent."""
-    return db.query(models.Audit).order_by(desc(models.Audit.id)).offset(skip).limit(limit).all()
+def audit_by_commit_query(repo_owner: str, repo_name: str, commit_sha: str, jd_hash: str, deep: bool = False):
+    # Rows from before the deep column existed are NULL, i.e. shallow
+    depth = models.Audit.deep.is_(True) if deep else or_(models.Audit.deep.is_(False), models.Audit.deep.is_(None))
+    return (
+        select(models.Audit)
+        .where(*_valid_at_commit(repo_owner, repo_name, commit_sha), models.Audit.jd_hash == jd_hash, depth)
+        .order_by(desc(models.Audit.id))
+        .limit(1)
+    )
+
+def audits_at_commit_query(repo_owner: str, repo_name: str, commit_sha: str):
+    """Every verdict valid for a repo at a commit (one per JD audited), newest first."""
+    return (
+        select(models.Audit)
+        .where(*_valid_at_commit(repo_owner, repo_name, commit_sha))
+        .order_by(desc(models.Audit.id))
+    )
+
+def vector_ids_after_query(audit_id: int):
+    """Ids of audits newer than audit_id having a stored pre-ranking vector."""
+    return select(models.AuditVector.audit_id).where(
+        models.AuditVector.audit_id > audit_id, models.AuditVector.dim == embeddings.EMBEDDING_DIM
+    )
+
+def vectors_by_id_query(audit_ids: List[int]):
+    """Stored pre-ranking vectors of the given audits, in id order."""
+    return (
+        select(models.AuditVector.audit_id, models.AuditVector.vector)
+        .where(models.AuditVector.audit_id.in_(audit_ids), models.AuditVector.dim == embeddings.EMBEDDING_DIM)
+        .order_by(models.AuditVector.audit_id)
+    )
+
+def recon_snapshot_query(repo_owner: str, repo_name: str, commit_sha: str):
+    return select(models.ReconSnapshot).where(
+        models.ReconSnapshot.repo_owner == repo_owner,
+        models.ReconSnapshot.repo_name == repo_name,
+        models.ReconSnapshot.commit_sha == commit_sha,
+    )
+
+UNFINISHED_JOB_STATUSES = ("queued", "running")
+# updated_at given to released jobs: older than any staleness cutoff, so the next sweep claims them
+RELEASED_AT = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def active_job_query(dedupe_key: str, fresh_after: datetime):
+    return select(models.AuditJob).where(
+        models.AuditJob.dedupe_key == dedupe_key,
+        models.AuditJob.status.in_(UNFINISHED_JOB_STATUSES),
+        models.AuditJob.updated_at >= fresh_after,
+    ).limit(1)
+
+def stale_jobs_query(stale_before: datetime):
+    return select(models.AuditJob).where(
+        models.AuditJob.status.in_(UNFINISHED_JOB_STATUSES),
+        models.AuditJob.updated_at < stale_before,
+    ).order_by(models.AuditJob.created_at)
+
+def claim_job_query(job_id: str, stale_before: datetime):
+    """Touches the job only if it is still unfinished and stale, so exactly one claimer wins."""
+    return update(models.AuditJob).where(
+        models.AuditJob.id == job_id,
+        models.AuditJob.status.in_(UNFINISHED_JOB_STATUSES),
+        models.AuditJob.updated_at < stale_before,
+    ).values(updated_at=datetime.now(timezone.utc))
+
+def touch_jobs_query(job_ids: List[str]):
+    return update(models.AuditJob).where(
+        models.AuditJob.id.in_(job_ids),
+        models.AuditJob.status.in_(UNFINISHED_JOB_STATUSES),
+    ).values(updated_at=datetime.now(timezone.utc))
+
+def release_jobs_query():
+    return update(models.AuditJob).where(
+        models.AuditJob.status.in_(UNFINISHED_JOB_STATUSES)
+    ).values(updated_at=RELEASED_AT)
+
+def update_job_query(job_id: str, fields: dict):
+    return update(models.AuditJob).where(models.AuditJob.id == job_id).values(**fields)
+
+# --- AUDITS ---
+
+def encode_cursor(created_at: datetime, audit_id: int) -> str:
+    """Opaque keyset cursor: the (created_at, id) of the last row on a page."""
+    raw = json.dumps([created_at.isoformat(), audit_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on anything malformed."""
+    try:
+        created_at, audit_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(audit_id)
+    except Exception as e:
+        raise ValueError("Invalid history cursor.") from e
+
+# Columns of the history projection (no Text blobs)
+AUDIT_SUMMARY_COLUMNS = (
+    models.Audit.id,
+    models.Audit.repo_url,
+    models.Audit.repo_owner,
+    models.Audit.engineering_score,
+    models.Audit.match_score,
+    models.Audit.verdict,
+    models.Audit.created_at,
+)
+
+def audit_summaries_query(cursor: Optional[str] = None, limit: int = 50,
+                          verdict: Optional[str] = None, min_score: Optional[float] = None,
+                          max_score: Optional[float] = None, owner: Optional[str] = None,
+                          files: Optional[List[str]] = None, techs: Optional[List[str]] = None):
+    """
+    One page of history, newest first, as slim rows.
+    Keyset pagination on (created_at, id): each page is an index range scan
+    starting after the cursor, so page N costs the same as page 1 (no OFFSET).
+    files/techs require ALL given file names / technologies (e.g. Dockerfile + Go),
+    each an indexed EXISTS lookup on the child tables.
+    Selects limit + 1 rows; pass the result through summary_page().
+    """
+    query = select(*AUDIT_SUMMARY_COLUMNS)
+    if verdict:
+        query = query.where(models.Audit.verdict == verdict)
+    if min_score is not None:
+        query = query.where(models.Audit.engineering_score >= min_score)
+    if max_score is not None:
+        query = query.where(models.Audit.engineering_score <= max_score)
+    if owner:
+        query = query.where(models.Audit.repo_owner == owner.lower())
+    for name in files or ():
+        query = query.where(exists().where(models.AuditFile.audit_id == models.Audit.id, models.AuditFile.name == name))
+    for tech in techs or ():
+        query = query.where(exists().where(models.AuditTech.audit_id == models.Audit.id, models.AuditTech.name_key == tech.lower()))
+    if cursor:
+        created_at, audit_id = decode_cursor(cursor)
+        query = query.where(tuple_(models.Audit.created_at, models.Audit.id) < (created_at, audit_id))
+
+    # One extra row tells us whether another page exists
+    return query.order_by(desc(models.Audit.created_at), desc(models.Audit.id)).limit(limit + 1)
+
+def summary_page(rows, limit: int):
+    """Trims the extra row of audit_summaries_query. Returns (rows, next_cursor)."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+def audit_summaries_by_id_query(audit_ids: List[int]):
+    """Slim rows for the given audits (plus repo_name, to tell repos apart), in no particular order."""
+    return select(*AUDIT_SUMMARY_COLUMNS, models.Audit.repo_name).where(models.Audit.id.in_(audit_ids))
+
+def hash_readme(readme: str) -> str:
+    return hashlib.sha256(readme.encode("utf-8")).hexdigest()
+
+def _ensure_blob(db: Session, model, blob_hash: str, body: str):
+    """Inserts a content-addressed blob unless it already exists (or another session beats us to it)."""
+    if db.get(model, blob_hash) is not None:
+        return
+    try:
+        with db.begin_nested():
+            db.add(model(hash=blob_hash, body=body))
+    except IntegrityError:
+        pass
+
+def audit_children(found_files: List[str], tech_stack: List[str]):
+    """AuditFile/AuditTech rows for an audit's detections (duplicates dropped, order kept)."""
+    files = [models.AuditFile(path=path, name=path.rsplit("/", 1)[-1]) for path in dict.fromkeys(found_files)]
+    techs = {}
+    for tech in tech_stack:
+        techs.setdefault(tech.lower(), tech)
+    return files, [models.AuditTech(name=name, name_key=key) for key, name in techs.items()]
+
+def split_audit(audit_data: schemas.AuditCreate):
+    """
+    AuditCreate -> (Audit row, blobs to ensure, readme, jd).
+    README and JD bodies are stored once per content hash; detections become child rows.
+    """
+    data = audit_data.model_dump()
+    readme, jd = data.pop("readme_content"), data.pop("job_description")
+    files, techs = audit_children(data.pop("found_files"), data.pop("tech_stack"))
+
+    blobs = []
+    if readme:
+        data["readme_hash"] = hash_readme(readme)
+        blobs.append((models.ReadmeBlob, data["readme_hash"], readme))
+    if data.get("jd_hash"):
+        blobs.append((models.JobDescriptionBlob, data["jd_hash"], jd or ""))
+    vector = models.AuditVector(
+        dim=embeddings.EMBEDDING_DIM, vector=embeddings.encode(embeddings.embed_repo(readme, audit_data.tech_stack)),
+    )
+    return models.Audit(**data, files=files, techs=techs, vector=vector), blobs, readme, jd
 
 def create_audit(db: Session, audit_data: schemas.AuditCreate) -> models.Audit:
-    """Creates a new audit record in the database."""
-    db_audit = models.Audit(**audit_data.model_dump())
+    """Creates a new audit record in the database (see split_audit for the layout)."""
+    db_audit, blobs, readme, jd = split_audit(audit_data)
+    for model, blob_hash, body in blobs:
+        _ensure_blob(db, model, blob_hash, body)
+
     db.add(db_audit)
+    db.flush()
+    search.index_audit(db, db_audit.id, db_audit.critique, jd, readme)
     db.commit()
     db.refresh(db_audit)
-    return db_audit
\ No newline at end of file
+    return db_audit
+
+# --- JOBS ---
+
+def new_job(job_id: str, repo_url: str, job_description, force_reaudit: bool, dedupe_key: str, **fields) -> models.AuditJob:
+    return models.AuditJob(
+        id=job_id, status=fields.pop("status", "queued"), repo_url=repo_url, job_description=job_description,
+        force_reaudit=force_reaudit, dedupe_key=dedupe_key, **fields,
+    )
+
+def release_unfinished_jobs(db: Session) -> int:
+    """
+    Marks every queued or running job as abandoned, for the next worker sweep to claim.
+    Only safe when no worker is running (process start, before gunicorn forks).
+    """
+    released = db.execute(release_jobs_query()).rowcount
+    db.commit()
+    return released
+
@@ -0,0 +1,198 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, embeddings, models, schemas, search
+
+# AsyncSession equivalents of crud, for handlers and the audit pipeline.
+# Statements come from crud so both layers issue the same SQL.
+
+# Relationships read by AuditResponse; loaded eagerly since async sessions can't lazy-load
+AUDIT_RESPONSE_RELATIONSHIPS = ["jd", "files", "techs"]
+# Vectors read per query when filling the pre-ranking index (bounds the IN list)
+VECTOR_READ_BATCH = 5000
+
+# --- AUDITS ---
+
+async def get_audit_by_commit(db: AsyncSession, repo_owner: str, repo_name: str, commit_sha: str, jd_hash: str, deep: bool = False):
+    """Fetches the latest verdict for a repo at a given commit, audited against a given JD."""
+    result = await db.execute(crud.audit_by_commit_query(repo_owner, repo_name, commit_sha, jd_hash, deep))
+    return result.scalars().first()
+
+async def get_audits_at_commit(db: AsyncSession, repo_owner: str, repo_name: str, commit_sha: str) -> List[models.Audit]:
+    """Latest verdict per JD (and per shallow / deep mode) for a repo at a given commit."""
+    result = await db.execute(crud.audits_at_commit_query(repo_owner, repo_name, commit_sha))
+    latest = {}
+    for audit in result.scalars().all():
+        latest.setdefault((audit.jd_hash, bool(audit.deep)), audit)
+    return list(latest.values())
+
+async def carry_audits(db: AsyncSession, audits: List[models.Audit], commit_sha: str):
+    """
+    Marks verdicts as still valid at a new commit (a push left the audited artifacts
+    untouched). Only a pointer is stored; the audit keeps the commit it was made at.
+    """
+    db.add_all([
+        models.CarriedVerdict(repo_owner=audit.repo_owner, repo_name=audit.repo_name, commit_sha=commit_sha, audit_id=audit.id)
+        for audit in audits
+    ])
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent delivery of the same push carried them first
+        await db.rollback()
+
+async def get_audit(db: AsyncSession, audit_id: int):
+    """Fetches a single audit record from the DB by its ID."""
+    return await db.get(models.Audit, audit_id)
+
+async def get_audit_summaries(db: AsyncSession, cursor: Optional[str] = None, limit: int = 50, **filters):
+    """See crud.audit_summaries_query. Returns (rows, next_cursor)."""
+    result = await db.execute(crud.audit_summaries_query(cursor, limit, **filters))
+    return crud.summary_page(result.all(), limit)
+
+async def _ensure_blob(db: AsyncSession, model, blob_hash: str, body: str):
+    if await db.get(model, blob_hash) is not None:
+        return
+    try:
+        async with db.begin_nested():
+            db.add(model(hash=blob_hash, body=body))
+    except IntegrityError:
+        pass
+
+async def create_audit(db: AsyncSession, audit_data: schemas.AuditCreate) -> models.Audit:
+    """Creates a new audit record in the database (see crud.split_audit for the layout)."""
+    db_audit, blobs, readme, jd = crud.split_audit(audit_data)
+    for model, blob_hash, body in blobs:
+        await _ensure_blob(db, model, blob_hash, body)
+
+    db.add(db_audit)
+    await db.flush()
+    statement = search.index_statement(db.bind.dialect.name, db_audit.id, db_audit.critique, jd, readme)
+    if statement is not None:
+        await db.execute(statement)
+    await db.commit()
+    await db.refresh(db_audit, attribute_names=["created_at", *AUDIT_RESPONSE_RELATIONSHIPS])
+    return db_audit
+
+async def search_audits(db: AsyncSession, q: str, **options) -> dict:
+    """See search.search_queries."""
+    queries = search.search_queries(db.bind.dialect.name, q, **options)
+    if queries is None:
+        return search.EMPTY_RESULT
+    return search.search_result(*[(await db.execute(query)).all() for query in queries])
+
+# --- PRE-RANKING ---
+
+async def refresh_vector_index(db: AsyncSession, index: embeddings.VectorIndex = embeddings.vector_index):
+    """
+    Appends vectors the index doesn't hold yet (every audit, from any worker). Ids are
+    rescanned from VECTOR_RESCAN_IDS below the highest one held, so an audit committed
+    after a higher id still gets in; only the missing vectors are read.
+    """
+    after = max(0, index.last_id - embeddings.VECTOR_RESCAN_IDS)
+    missing = index.missing((await db.execute(crud.vector_ids_after_query(after))).scalars().all())
+    for start in range(0, len(missing), VECTOR_READ_BATCH):
+        rows = (await db.execute(crud.vectors_by_id_query(missing[start:start + VECTOR_READ_BATCH]))).all()
+        await asyncio.to_thread(index.add, rows)
+
+async def rank_audits(db: AsyncSession, job_description: str, limit: int = 20,
+                      min_similarity: Optional[float] = None) -> List[dict]:
+    """
+    The archive ranked against a JD by vector similarity, one entry per repo (its
+    best-matching audit). Candidates are pulled from the index in growing windows
+    until limit distinct repos are found.
+    """
+    index = embeddings.vector_index
+    await refresh_vector_index(db, index)
+    query = embeddings.embed_text(job_description)
+    window = limit * 4
+    while True:
+        ranked = index.rank(query, window, min_similarity)
+        rows = (await db.execute(crud.audit_summaries_by_id_query([audit_id for audit_id, _ in ranked]))).all()
+        by_id = {row.id: row for row in rows}
+        items, seen = [], set()
+        for audit_id, similarity in ranked:
+            row = by_id.get(audit_id) # Missing if the audit was deleted since indexing
+            if row is None or (row.repo_owner, row.repo_name) in seen:
+                continue
+            seen.add((row.repo_owner, row.repo_name))
+            items.append({**row._asdict(), "similarity": round(similarity, 4)})
+            if len(items) == limit:
+                return items
+        if len(ranked) < window:
+            return items
+        window *= 4
+
+# --- RECONNAISSANCE ---
+
+async def get_recon_snapshot(db: AsyncSession, repo_owner: str, repo_name: str, commit_sha: str):
+    """Fetches stored reconnaissance for a repo at a given commit."""
+    result = await db.execute(crud.recon_snapshot_query(repo_owner, repo_name, commit_sha))
+    return result.scalars().first()
+
+async def create_recon_snapshot(db: AsyncSession, repo_owner: str, repo_name: str, commit_sha: str, payload: dict):
+    """
+    Stores reconnaissance for a commit. A concurrent insert of the same commit is harmless;
+    an existing row is only rewritten when the payload grew (deep signals added later).
+    """
+    snapshot = models.ReconSnapshot(repo_owner=repo_owner, repo_name=repo_name, commit_sha=commit_sha, payload=payload)
+    db.add(snapshot)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        snapshot = await get_recon_snapshot(db, repo_owner, repo_name, commit_sha)
+        if snapshot is not None and snapshot.payload != payload:
+            snapshot.payload = payload
+            await db.commit()
+        return snapshot
+    return snapshot
+
+# --- JOBS ---
+
+async def create_job(db: AsyncSession, job_id: str, repo_url: str, job_description, force_reaudit: bool, dedupe_key: str, **fields) -> models.AuditJob:
+    """Persists a newly queued audit job (or, with status/audit_id, an already finished one)."""
+    db_job = crud.new_job(job_id, repo_url, job_description, force_reaudit, dedupe_key, **fields)
+    db.add(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    return db_job
+
+async def get_job(db: AsyncSession, job_id: str):
+    """Fetches a single audit job by its ID."""
+    return await db.get(models.AuditJob, job_id)
+
+async def get_active_job(db: AsyncSession, dedupe_key: str, fresh_after: datetime):
+    """Fetches a queued or running job for the same repo + JD still being worked on, if any."""
+    result = await db.execute(crud.active_job_query(dedupe_key, fresh_after))
+    return result.scalars().first()
+
+async def get_stale_jobs(db: AsyncSession, stale_before: datetime) -> List[models.AuditJob]:
+    """Unfinished jobs nobody has touched since stale_before (their worker died or stopped), oldest first."""
+    result = await db.execute(crud.stale_jobs_query(stale_before))
+    return list(result.scalars().all())
+
+async def claim_job(db: AsyncSession, job_id: str, stale_before: datetime) -> bool:
+    """Takes over a stale job; False if it finished or another process claimed it first."""
+    result = await db.execute(crud.claim_job_query(job_id, stale_before))
+    await db.commit()
+    return result.rowcount == 1
+
+async def touch_jobs(db: AsyncSession, job_ids: List[str]):
+    """Heartbeat: marks jobs this process holds as still being worked on."""
+    await db.execute(crud.touch_jobs_query(job_ids))
+    await db.commit()
+
+async def release_unfinished_jobs(db: AsyncSession) -> int:
+    """See crud.release_unfinished_jobs."""
+    result = await db.execute(crud.release_jobs_query())
+    await db.commit()
+    return result.rowcount
+
+async def update_job(db: AsyncSession, job_id: str, **fields):
+    """Updates status/result columns of a job."""
+    await db.execute(crud.update_job_query(job_id, fields))
+    await db.commit()
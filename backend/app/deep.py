@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import zlib
+import asyncio
+import logging
+import tarfile
+import tomllib
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from . import metrics
+from .github import GITHUB_API_URL, get_client
+from .ratelimit import GitHubRateLimited
+from .utils import FILE_MATCHER
+
+logger = logging.getLogger(__name__)
+
+# Deep reconnaissance: the repository archive is streamed ONCE and every member is
+# inspected in memory as it goes by (never extracted to disk). Caps keep memory and
+# time bounded regardless of repo size; hitting one marks the signals as partial.
+DEEP_MAX_ARCHIVE_BYTES = int(os.getenv("DEEP_MAX_ARCHIVE_BYTES", str(100 * 1024 * 1024))) # compressed
+DEEP_MAX_FILES = int(os.getenv("DEEP_MAX_FILES", "20000"))
+DEEP_MAX_MEMBER_BYTES = int(os.getenv("DEEP_MAX_MEMBER_BYTES", str(512 * 1024))) # larger files are counted, not read
+DEEP_CHUNK_BYTES = 64 * 1024
+DEEP_QUEUE_CHUNKS = 16 # Download runs at most this many chunks ahead of the scanner
+DEEP_READ_TIMEOUT = 60.0
+
+# --- SIGNALS ---
+
+LANGUAGES = {
+    "py": "Python", "ipynb": "Jupyter", "js": "JavaScript", "jsx": "JavaScript", "mjs": "JavaScript",
+    "ts": "TypeScript", "tsx": "TypeScript", "go": "Go", "rs": "Rust", "java": "Java", "kt": "Kotlin",
+    "scala": "Scala", "rb": "Ruby", "php": "PHP", "cs": "C#", "c": "C", "h": "C", "cpp": "C++", "cc": "C++",
+    "hpp": "C++", "swift": "Swift", "m": "Objective-C", "dart": "Dart", "ex": "Elixir", "exs": "Elixir",
+    "sql": "SQL", "sh": "Shell", "tf": "HCL", "vue": "Vue", "svelte": "Svelte", "r": "R", "jl": "Julia",
+}
+
+_TEST_PATH = re.compile(
+    r"(?:^|/)(?:tests?|__tests__|specs?)/"
+    r"|(?:^|/)test_[^/]+\.py$|_test\.(?:py|go)$|\.(?:test|spec)\.[jt]sx?$|Tests?\.(?:java|kt|cs)$"
+)
+_WORKFLOW = re.compile(r"^\.github/workflows/[^/]+\.ya?ml$")
+_REQUIREMENTS = re.compile(r"(?:^|/)requirements[^/]*\.txt$")
+_GITLAB_RESERVED = {"stages", "variables", "default", "include", "image", "services", "before_script",
+                    "after_script", "cache", "workflow", "pages"}
+
+def language_of(path: str) -> Optional[str]:
+    name = path.rsplit("/", 1)[-1]
+    return LANGUAGES.get(name.rsplit(".", 1)[-1].lower()) if "." in name else None
+
+def is_test_path(path: str) -> bool:
+    return bool(_TEST_PATH.search(path))
+
+def count_loc(data: bytes) -> Optional[int]:
+    """Non-blank lines, or None for binary content."""
+    if b"\0" in data[:8192]:
+        return None
+    return sum(1 for line in data.splitlines() if line.strip())
+
+def count_workflow_jobs(text: str) -> int:
+    """Jobs in a GitHub Actions workflow: the keys one level under the top-level `jobs:`."""
+    jobs, indent, in_jobs = 0, None, False
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        depth = len(line) - len(line.lstrip())
+        if depth == 0:
+            in_jobs = line.rstrip().startswith("jobs:")
+            continue
+        if in_jobs and re.match(r"^\s+[\w.-]+:\s*(?:#.*)?$", line):
+            indent = indent or depth
+            jobs += depth == indent
+    return jobs
+
+def count_gitlab_jobs(text: str) -> int:
+    """Top-level keys of .gitlab-ci.yml that aren't keywords or hidden templates."""
+    keys = re.findall(r"^([\w-][\w .-]*):", text, re.MULTILINE)
+    return sum(1 for key in keys if key not in _GITLAB_RESERVED)
+
+def _pyproject_dependencies(data: dict) -> int:
+    project = data.get("project", {})
+    count = len(project.get("dependencies", []))
+    count += sum(len(group) for group in project.get("optional-dependencies", {}).values())
+    poetry = data.get("tool", {}).get("poetry", {})
+    count += len([name for name in poetry.get("dependencies", {}) if name.lower() != "python"])
+    count += len(poetry.get("dev-dependencies", {}))
+    count += sum(len(group.get("dependencies", {})) for group in poetry.get("group", {}).values())
+    return count
+
+def count_dependencies(path: str, text: str):
+    """(ecosystem, declared dependency count) for a dependency manifest, else None."""
+    name = path.rsplit("/", 1)[-1]
+    try:
+        if _REQUIREMENTS.search(path):
+            lines = (line.split("#", 1)[0].strip() for line in text.splitlines())
+            return "pypi", sum(1 for line in lines if line and not line.startswith("-"))
+        if name == "pyproject.toml":
+            return "pypi", _pyproject_dependencies(tomllib.loads(text))
+        if name in ("package.json", "composer.json"):
+            data = json.loads(text)
+            sections = ("dependencies", "devDependencies", "peerDependencies") if name == "package.json" else ("require", "require-dev")
+            return ("npm" if name == "package.json" else "composer"), sum(len(data.get(key) or {}) for key in sections)
+        if name == "go.mod":
+            block = re.findall(r"^require\s*\((.*?)^\)", text, re.MULTILINE | re.DOTALL)
+            single = re.findall(r"^require[ \t]+[^\s(]", text, re.MULTILINE)
+            return "go", len(single) + sum(1 for b in block for line in b.splitlines() if line.strip() and not line.strip().startswith("//"))
+        if name == "Cargo.toml":
+            data = tomllib.loads(text)
+            return "cargo", sum(len(data.get(key, {})) for key in ("dependencies", "dev-dependencies", "build-dependencies"))
+        if name == "Gemfile":
+            return "rubygems", len(re.findall(r"^\s*gem\s", text, re.MULTILINE))
+        if name == "pom.xml":
+            return "maven", text.count("<dependency>")
+        if name in ("build.gradle", "build.gradle.kts"):
+            return "maven", len(re.findall(r"^\s*(?:implementation|api|compileOnly|runtimeOnly|testImplementation)\b", text, re.MULTILINE))
+    except (ValueError, tomllib.TOMLDecodeError, AttributeError, TypeError):
+        return None # Malformed manifest: no count rather than a wrong one
+    return None
+
+class SignalCollector:
+    """Accumulates the single-pass signals, one archive member at a time."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.languages: Dict[str, Dict[str, int]] = {}
+        self.source_files = 0
+        self.test_files = 0
+        self.ci_workflows = 0
+        self.ci_jobs = 0
+        self.manifests = 0
+        self.dependencies: Dict[str, int] = {}
+        self.skipped_large = 0
+        self.truncated = False
+
+    def add(self, path: str, size: int, data: Optional[bytes]):
+        """data is None when the member was over the size cap (counted, not read)."""
+        self.files += 1
+        self.bytes += size
+        language = language_of(path)
+        if language:
+            stats = self.languages.setdefault(language, {"files": 0, "loc": 0})
+            stats["files"] += 1
+            self.source_files += 1
+            self.test_files += is_test_path(path)
+            loc = count_loc(data) if data is not None else None
+            stats["loc"] += loc or 0
+        if data is None:
+            self.skipped_large += 1
+            return
+
+        if _WORKFLOW.match(path) or path == ".gitlab-ci.yml":
+            text = data.decode("utf-8", "replace")
+            self.ci_workflows += 1
+            self.ci_jobs += count_workflow_jobs(text) if path.startswith(".github/") else count_gitlab_jobs(text)
+        else:
+            counted = count_dependencies(path, data.decode("utf-8", "replace")) if FILE_MATCHER.match(path) & {"stack"} else None
+            if counted:
+                ecosystem, n = counted
+                self.manifests += 1
+                self.dependencies[ecosystem] = self.dependencies.get(ecosystem, 0) + n
+
+    def result(self) -> dict:
+        languages = dict(sorted(self.languages.items(), key=lambda item: -item[1]["loc"]))
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "languages": languages,
+            "loc": sum(stats["loc"] for stats in languages.values()),
+            "source_files": self.source_files,
+            "test_files": self.test_files,
+            "test_ratio": round(self.test_files / self.source_files, 3) if self.source_files else 0.0,
+            "ci_workflows": self.ci_workflows,
+            "ci_jobs": self.ci_jobs,
+            "manifests": self.manifests,
+            "dependencies": dict(sorted(self.dependencies.items())),
+            "skipped_large": self.skipped_large,
+            "truncated": self.truncated,
+        }
+
+# --- ARCHIVE SCAN ---
+
+class GunzipReader:
+    """
+    Forward-only file object yielding the gunzipped bytes of a chunk source
+    (next_chunk() returns None at end of stream). Inflating at most what each read
+    asks for keeps memory flat even for highly compressible archives, which
+    tarfile's own "r|gz" layer buffers (and re-slices) in full.
+    """
+
+    def __init__(self, next_chunk: Callable[[], Optional[bytes]]):
+        self._next_chunk = next_chunk
+        self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) # gzip header
+        self._pending = b"" # Compressed input not inflated yet
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = DEEP_MAX_MEMBER_BYTES
+        parts, wanted = [], size
+        while wanted > 0:
+            if not self._pending:
+                if self._eof or self._inflate.eof:
+                    break
+                chunk = self._next_chunk()
+                if chunk is None:
+                    self._eof = True
+                    continue
+                self._pending = chunk
+            data = self._inflate.decompress(self._pending, wanted)
+            self._pending = self._inflate.unconsumed_tail
+            if self._inflate.eof:
+                self._pending = b""
+            parts.append(data)
+            wanted -= len(data)
+        return b"".join(parts)
+
+def scan_archive(fileobj, max_files: int = DEEP_MAX_FILES, max_member_bytes: int = DEEP_MAX_MEMBER_BYTES) -> dict:
+    """
+    Single streaming pass over an uncompressed tar stream (tarfile "r|": forward-only,
+    no seeking, nothing written to disk). Vendored directories are skipped like in reconnaissance.
+    """
+    signals = SignalCollector()
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                # GitHub archives wrap everything in one "<owner>-<repo>-<sha>/" directory
+                path = member.name.split("/", 1)[1] if "/" in member.name else member.name
+                if FILE_MATCHER.ignored(path):
+                    continue
+                if signals.files >= max_files:
+                    signals.truncated = True
+                    break
+                data = None
+                if member.size <= max_member_bytes:
+                    data = archive.extractfile(member).read()
+                signals.add(path, member.size, data)
+    except (tarfile.TarError, EOFError, OSError, zlib.error):
+        # Archive cut off by the size cap or a failed download: keep what was read
+        signals.truncated = True
+    return signals.result()
+
+async def fetch_deep_signals(owner: str, repo: str, commit_sha: str) -> Optional[dict]:
+    """
+    Streams the repository tarball at a commit through scan_archive.
+    The download feeds a bounded queue that a worker thread drains, so at most
+    DEEP_QUEUE_CHUNKS chunks plus one member are in memory at any time.
+    Returns None if the archive could not be fetched (deep signals are best effort).
+    """
+    loop = asyncio.get_running_loop()
+    # Unbounded so the end marker can always be queued, even by a cancelled producer;
+    # the slots keep at most DEEP_QUEUE_CHUNKS chunks waiting
+    chunks: asyncio.Queue = asyncio.Queue()
+    slots = asyncio.Semaphore(DEEP_QUEUE_CHUNKS)
+    state = {"status": None, "capped": False}
+
+    async def receive():
+        received = 0
+        async with get_client().stream(f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{commit_sha}") as res:
+            state["status"] = res.status_code
+            if res.status_code != 200:
+                return
+            async for chunk in res.aiter_bytes(DEEP_CHUNK_BYTES):
+                received += len(chunk)
+                if received > DEEP_MAX_ARCHIVE_BYTES:
+                    state["capped"] = True
+                    return
+                await slots.acquire()
+                chunks.put_nowait(chunk)
+
+    async def download():
+        try:
+            await receive()
+        except (httpx.HTTPError, GitHubRateLimited) as e:
+            state["status"] = e.__class__.__name__
+        finally:
+            chunks.put_nowait(None)
+
+    async def take() -> Optional[bytes]:
+        chunk = await chunks.get()
+        slots.release()
+        return chunk
+
+    def next_chunk() -> Optional[bytes]:
+        future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(take(), DEEP_READ_TIMEOUT), loop)
+        try:
+            return future.result()
+        except Exception: # Timed out or the loop is shutting down: treat as end of stream
+            return None
+
+    with metrics.span("recon.deep"):
+        producer = asyncio.create_task(download())
+        try:
+            signals = await asyncio.to_thread(scan_archive, GunzipReader(next_chunk))
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    if state["status"] != 200:
+        logger.warning("Deep reconnaissance of %s/%s@%s skipped: archive fetch returned %s", owner, repo, commit_sha, state["status"])
+        return None
+    signals["truncated"] = signals["truncated"] or state["capped"]
+    return signals
@@ -0,0 +1,187 @@
+import os
+import re
+import math
+import zlib
+import threading
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Local, model-free text vectors for pre-ranking repos against a JD before any LLM call.
+# Tokens are feature-hashed into EMBEDDING_DIM signed buckets (no fitted vocabulary, so a
+# vector never goes stale and every process computes the same one). Stored vectors hold
+# sublinear term frequencies; IDF is applied at query time over whatever set is being
+# ranked, which makes re-ranking the archive for a new JD one matrix-vector product.
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))
+EMBED_README_CHARS = 20000 # Enough to characterize a project; long READMEs are mostly reference material
+TECH_WEIGHT = 3.0 # Detected technologies count as much as three README mentions
+# Audit ids commit out of order across workers, so each refresh looks this far below the
+# highest id held for vectors that landed after a higher one
+VECTOR_RESCAN_IDS = int(os.getenv("VECTOR_RESCAN_IDS", "1000"))
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+_URL = re.compile(r"https?://\S+|```.*?(?:```|$)", re.S)
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can do for from has have how i if in into is it its
+more must not of on or our should so such than that the their them then there these
+they this to use used using was we were what when which will with would you your
+""".split())
+# Common spellings of the same technology, so "Postgres" in a JD meets "PostgreSQL" in a stack
+ALIASES = {
+    "postgres": "postgresql", "golang": "go", "k8s": "kubernetes", "js": "javascript",
+    "ts": "typescript", "py": "python", "nodejs": "node.js", "reactjs": "react", "sklearn": "scikit-learn",
+}
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(_URL.sub(" ", text.lower())):
+        token = ALIASES.get(token, token)
+        if token not in _STOPWORDS and not token.isdigit():
+            tokens.append(token)
+    return tokens
+
+def embed_counts(counts: Counter) -> np.ndarray:
+    """Weighted token counts -> L2-normalized float32 vector (1 + log tf per token)."""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token, count in counts.items():
+        h = zlib.crc32(token.encode("utf-8"))
+        # Low bits pick the bucket, the top bit the sign, so collisions cancel out on average
+        vector[h % EMBEDDING_DIM] += (1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def embed_text(text: Optional[str]) -> np.ndarray:
+    """Vector of a free text (a job description)."""
+    return embed_counts(Counter(tokenize(text or "")))
+
+def embed_repo(readme: Optional[str], tech_stack: Sequence[str]) -> np.ndarray:
+    """Vector of a repo: its README plus the detected tech stack, up-weighted."""
+    counts = Counter(tokenize((readme or "")[:EMBED_README_CHARS]))
+    for tech in tech_stack:
+        for token in tokenize(tech):
+            counts[token] += TECH_WEIGHT
+    return embed_counts(counts)
+
+def encode(vector: np.ndarray) -> bytes:
+    return vector.astype(np.float32).tobytes()
+
+def decode(data: bytes) -> Optional[np.ndarray]:
+    """Stored bytes -> vector; None if it was written with another EMBEDDING_DIM."""
+    vector = np.frombuffer(data, dtype=np.float32)
+    return vector if vector.shape[0] == EMBEDDING_DIM else None
+
+# --- SIMILARITY ---
+
+def idf_weights(document_frequency: np.ndarray, n_documents: int) -> np.ndarray:
+    """Smoothed IDF per bucket (the sklearn formula)."""
+    return (np.log((1.0 + n_documents) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+
+def similarities(matrix: np.ndarray, query: np.ndarray, idf: Optional[np.ndarray] = None,
+                 row_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Cosine similarity of every row of matrix with query after IDF weighting:
+    (M * idf) . (q * idf) / (|M * idf| |q * idf|) computed as M @ (q * idf^2), so the
+    weighted matrix is never materialized. idf defaults to the matrix's own document
+    frequencies; row_norms (|M * idf| per row) can be passed in when cached.
+    """
+    if matrix.shape[0] == 0:
+        return np.zeros(0, dtype=np.float32)
+    if idf is None:
+        idf = idf_weights(np.count_nonzero(matrix, axis=0), matrix.shape[0])
+    squared = idf * idf
+    query_norm = float(np.sqrt(np.dot(query * query, squared)))
+    if row_norms is None:
+        row_norms = weighted_norms(matrix, squared)
+    if query_norm == 0.0:
+        return np.zeros(matrix.shape[0], dtype=np.float32)
+    return (matrix @ (query * squared)) / (np.maximum(row_norms, 1e-12) * query_norm)
+
+def weighted_norms(matrix: np.ndarray, squared_idf: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """|M * idf| per row, in chunks so the temporary stays small for a large archive."""
+    norms = np.empty(matrix.shape[0], dtype=np.float32)
+    for start in range(0, matrix.shape[0], chunk):
+        block = matrix[start:start + chunk]
+        norms[start:start + chunk] = np.sqrt((block * block) @ squared_idf)
+    return norms
+
+def select_top(scores: np.ndarray, top_k: Optional[int] = None, min_similarity: Optional[float] = None) -> np.ndarray:
+    """Row indices to keep, best first: at most top_k, each at least min_similarity."""
+    if top_k is not None and top_k < scores.shape[0]:
+        # Partial selection first: O(n) instead of sorting the whole archive
+        order = np.argpartition(-scores, top_k - 1)[:top_k]
+        order = order[np.argsort(-scores[order], kind="stable")]
+    else:
+        order = np.argsort(-scores, kind="stable")
+    if min_similarity is not None:
+        order = order[scores[order] >= min_similarity]
+    return order
+
+# --- ARCHIVE INDEX ---
+
+class VectorIndex:
+    """
+    Every stored audit vector as one in-memory matrix, per process.
+    New rows are appended from audit_vectors by id (refresh), and document frequencies
+    are kept incrementally, so ranking the archive for a JD is a single matrix-vector
+    product plus a norm pass only when rows were added since the last query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._df = np.zeros(EMBEDDING_DIM, dtype=np.int64)
+        self._weights: Optional[Tuple[np.ndarray, np.ndarray]] = None # (idf, row norms) for the current rows
+        self._held = set()
+        self.last_id = 0 # Highest audit id held
+
+    def __len__(self):
+        return self._size
+
+    def missing(self, audit_ids: Sequence[int]) -> List[int]:
+        """The given ids not held yet."""
+        with self._lock:
+            return [audit_id for audit_id in audit_ids if audit_id not in self._held]
+
+    def add(self, rows: Sequence[Tuple[int, bytes]]):
+        """Appends (audit_id, stored vector) rows not held yet."""
+        with self._lock:
+            # Two refreshes can race for the same rows: each id goes in once
+            decoded = [(audit_id, decode(data)) for audit_id, data in dict(rows).items() if audit_id not in self._held]
+            decoded = [(audit_id, vector) for audit_id, vector in decoded if vector is not None]
+            if not decoded:
+                return
+            needed = self._size + len(decoded)
+            if needed > self._matrix.shape[0]:
+                # Capacity doubles, so appends are amortized O(1) per row
+                capacity = max(needed, 2 * self._matrix.shape[0], 1024)
+                matrix = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32)
+                matrix[:self._size] = self._matrix[:self._size]
+                ids = np.zeros(capacity, dtype=np.int64)
+                ids[:self._size] = self._ids[:self._size]
+                self._matrix, self._ids = matrix, ids
+            block = np.stack([vector for _, vector in decoded])
+            self._matrix[self._size:needed] = block
+            self._ids[self._size:needed] = [audit_id for audit_id, _ in decoded]
+            self._df += np.count_nonzero(block, axis=0)
+            self._size = needed
+            self._weights = None
+            self._held.update(audit_id for audit_id, _ in decoded)
+            self.last_id = max(self.last_id, max(audit_id for audit_id, _ in decoded))
+
+    def rank(self, query: np.ndarray, top_k: Optional[int] = None,
+             min_similarity: Optional[float] = None) -> List[Tuple[int, float]]:
+        """[(audit_id, similarity)] best first."""
+        with self._lock:
+            matrix, ids = self._matrix[:self._size], self._ids[:self._size]
+            if self._weights is None:
+                idf = idf_weights(self._df, self._size)
+                self._weights = (idf, weighted_norms(matrix, idf * idf))
+            idf, norms = self._weights
+        scores = similarities(matrix, query, idf, norms)
+        order = select_top(scores, top_k, min_similarity)
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+vector_index = VectorIndex()
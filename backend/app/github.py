@@ -0,0 +1,159 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import httpx
+
+from . import metrics
+from .ratelimit import ETagCache, TokenPool, is_throttled, load_tokens
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_RAW_URL = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com").rstrip("/")
+
+# Upper bound on in-flight GitHub requests per process (shared by every audit)
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "16"))
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", "30"))
+GITHUB_ETAG_CACHE_BYTES = int(os.getenv("GITHUB_ETAG_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+def endpoint_label(path: str) -> str:
+    """Low-cardinality metrics label for a request path: trees, commits, readme, repo, ... or raw."""
+    parts = path.strip("/").split("/")
+    if parts[0] != "repos" or len(parts) < 3:
+        return "raw"
+    rest = parts[3:]
+    if not rest:
+        return "repo"
+    return rest[1] if rest[0] == "git" and len(rest) > 1 else rest[0]
+
+def get_github_headers(token: Optional[str] = None):
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Accept": "application/vnd.github.v3+json"
+    }
+    token = token or os.getenv("GITHUB_TOKEN")
+    if token:
+        headers["Authorization"] = f"token {token}"
+    return headers
+
+class GitHubClient:
+    """
+    Async GitHub client backed by ONE pooled httpx connection set.
+    Keep-alive connections are reused across audits (no TLS handshake per probe),
+    and a semaphore caps how many requests run at once.
+
+    Every request goes through the rate-limit scheduler: the token pool picks the
+    token with the most quota left, throttled tokens are rotated out, and cached
+    ETags turn repeat lookups into free 304s. When no token has quota left,
+    GitHubRateLimited is raised instead of returning an empty result.
+    """
+
+    def __init__(self, max_concurrency: int = GITHUB_MAX_CONCURRENCY, timeout: float = GITHUB_TIMEOUT,
+                 pool: Optional[TokenPool] = None, etags: Optional[ETagCache] = None):
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.pool = pool or token_pool
+        self.etags = etags or etag_cache
+
+    async def get(self, url: str, headers: Optional[dict] = None, **kwargs) -> httpx.Response:
+        tried = []
+        while True:
+            token = self.pool.acquire(exclude=tried)
+            request_headers = get_github_headers(token)
+            if not token:
+                request_headers.pop("Authorization", None)
+            if headers:
+                request_headers.update(headers)
+            request = self._client.build_request("GET", url, headers=request_headers, **kwargs)
+            cache_key = ETagCache.key(request)
+            cached = self.etags.get(cache_key)
+            if cached:
+                request.headers["If-None-Match"] = cached.etag
+
+            endpoint = endpoint_label(request.url.path)
+            try:
+                async with self._semaphore:
+                    res = await self._client.send(request)
+            except httpx.HTTPError:
+                metrics.github_requests.inc(endpoint=endpoint, status="error")
+                raise
+            metrics.github_requests.inc(endpoint=endpoint, status=res.status_code)
+            self.pool.update(token, res)
+
+            if is_throttled(res):
+                # Rotate to the next token; acquire() raises once every token is spent
+                tried.append(token)
+                continue
+            if res.status_code == 304 and cached:
+                return cached.to_response(request)
+            if res.status_code == 200:
+                self.etags.put(cache_key, res)
+            return res
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[dict] = None, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        GET whose body is read incrementally (repository archives). Same token rotation
+        as get(), but no ETag caching, and one concurrency slot is held until the body is consumed.
+        """
+        tried = []
+        async with self._semaphore:
+            while True:
+                token = self.pool.acquire(exclude=tried)
+                request_headers = get_github_headers(token)
+                if not token:
+                    request_headers.pop("Authorization", None)
+                if headers:
+                    request_headers.update(headers)
+                request = self._client.build_request("GET", url, headers=request_headers, **kwargs)
+                endpoint = endpoint_label(request.url.path)
+                try:
+                    res = await self._client.send(request, stream=True)
+                except httpx.HTTPError:
+                    metrics.github_requests.inc(endpoint=endpoint, status="error")
+                    raise
+                metrics.github_requests.inc(endpoint=endpoint, status=res.status_code)
+                self.pool.update(token, res)
+                if is_throttled(res):
+                    await res.aclose()
+                    tried.append(token)
+                    continue
+                try:
+                    yield res
+                finally:
+                    await res.aclose()
+                return
+
+    async def aclose(self):
+        await self._client.aclose()
+
+# Quota and ETags are per process, not per event loop, so they outlive client rebuilds
+token_pool = TokenPool(load_tokens())
+etag_cache = ETagCache(GITHUB_ETAG_CACHE_BYTES)
+
+_client: Optional[GitHubClient] = None
+_client_loop = None
+
+def get_client() -> GitHubClient:
+    """
+    Returns the process-wide client, creating it on first use.
+    A client is bound to the event loop that created it, so a new one is built
+    if called from a different loop (e.g. scripts calling asyncio.run repeatedly).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = GitHubClient()
+        _client_loop = loop
+    return _client
+
+async def close_client():
+    """Closes the pooled connections (called on app shutdown)."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
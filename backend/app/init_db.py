@@ -0,0 +1,22 @@
+"""
+One-time schema setup: create tables, apply migrations and build the search index.
+Run before starting workers (gunicorn.conf.py does this in the master process):
+
+    python -m app.init_db
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from . import migrations
+from .database import engine
+
+def main():
+    try:
+        migrations.run(engine)
+    finally:
+        # Don't hand pooled connections down to forked workers
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
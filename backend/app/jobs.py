@@ -0,0 +1,210 @@
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+
+from . import cache, crud_async, metrics, schemas
+from .database import AsyncSessionLocal
+from .pipeline import run_audit_pipeline
+from .ratelimit import GitHubRateLimited
+from .utils import require_repo
+
+logger = logging.getLogger(__name__)
+
+# Audits processed concurrently per process
+AUDIT_WORKERS = int(os.getenv("AUDIT_WORKERS", "4"))
+# Live processes touch the jobs they hold every JOB_STALE_SECONDS / 3; an unfinished job
+# untouched for JOB_STALE_SECONDS lost its worker (crash, recycle) and any process may claim it.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+# Whether startup releases every job left unfinished by the last shutdown for immediate pickup.
+# gunicorn does this once in the master instead: a worker booting next to live ones must not.
+RESUME_UNFINISHED_JOBS = os.getenv("RESUME_UNFINISHED_JOBS", "true").lower() == "true"
+# Job ids of cached hits: "verdict-<audit id>". Nothing is stored for them (uuid hex ids never contain "-").
+VERDICT_JOB_PREFIX = "verdict-"
+
+def _stale_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_SECONDS)
+
+async def _db_call(fn, *args, **kwargs):
+    async with AsyncSessionLocal() as db:
+        return await fn(db, *args, **kwargs)
+
+def _verdict_job(audit: schemas.AuditResponse) -> schemas.AuditJobResponse:
+    """The completed job a cached hit returns, built from its verdict alone."""
+    return schemas.AuditJobResponse(
+        id=f"{VERDICT_JOB_PREFIX}{audit.id}", status="completed", repo_url=audit.repo_url, audit_id=audit.id,
+        created_at=audit.created_at, updated_at=audit.created_at, audit=audit,
+    )
+
+async def _job_response(job_id: str) -> Optional[schemas.AuditJobResponse]:
+    if job_id.startswith(VERDICT_JOB_PREFIX):
+        audit_id = job_id[len(VERDICT_JOB_PREFIX):]
+        if not audit_id.isdigit():
+            return None
+        async with AsyncSessionLocal() as db:
+            audit = await crud_async.get_audit(db, int(audit_id))
+        return _verdict_job(schemas.AuditResponse.model_validate(audit)) if audit else None
+    async with AsyncSessionLocal() as db:
+        job = await crud_async.get_job(db, job_id)
+        if not job:
+            return None
+        response = schemas.AuditJobResponse.model_validate(job)
+        if job.audit_id:
+            audit = await crud_async.get_audit(db, job.audit_id)
+            response.audit = schemas.AuditResponse.model_validate(audit) if audit else None
+        return response
+
+class JobQueue:
+    """
+    Local worker pool behind POST /audit/.
+    Submissions are persisted to audit_jobs and processed by AUDIT_WORKERS asyncio
+    workers, so the request returns a job id immediately. Identical submissions
+    (same repo + JD) are coalesced onto the job already in flight, and a repo whose
+    HEAD already has a verdict gets a completed job back in the same request
+    without any row being written.
+    """
+
+    def __init__(self, workers: int = AUDIT_WORKERS):
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Dict[str, str] = {} # dedupe_key -> job_id
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        if RESUME_UNFINISHED_JOBS:
+            # Whatever was queued or running when the process last stopped goes to the first sweep
+            await _db_call(crud_async.release_unfinished_jobs)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._keepalive()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, req: schemas.AuditRequest) -> schemas.AuditJobResponse:
+        repo_url = str(req.repo_url)
+        owner, repo = require_repo(repo_url)
+        jd_hash = cache.hash_job_description(req.job_description)
+        deep = bool(req.deep)
+        dedupe_key = "/".join((*cache.repo_key(owner, repo), jd_hash, *(("deep",) if deep else ())))
+
+        if not req.force_reaudit:
+            cached = await self._submit_cached(owner, repo, jd_hash, deep)
+            if cached:
+                return cached
+
+        async with self._lock:
+            job_id = self._inflight.get(dedupe_key)
+            if job_id is None:
+                # Another worker process may already be running it
+                active = await _db_call(crud_async.get_active_job, dedupe_key, _stale_cutoff())
+                if active:
+                    return await self.get(active.id)
+                job_id = uuid.uuid4().hex
+                await _db_call(
+                    crud_async.create_job, job_id, repo_url, req.job_description, bool(req.force_reaudit), dedupe_key,
+                    deep=deep,
+                )
+                self._inflight[dedupe_key] = job_id
+                self._queue.put_nowait(job_id)
+        return await self.get(job_id)
+
+    async def _submit_cached(self, owner: str, repo: str, jd_hash: str,
+                             deep: bool = False) -> Optional[schemas.AuditJobResponse]:
+        """
+        Fast path: a verdict already exists for the current HEAD, so it is returned as a
+        completed job straight away instead of taking a trip through the queue. The job id
+        points at the audit, so repeated hits write nothing and the id stays pollable.
+        Any failure here just falls back to queueing, where errors are reported on the job.
+        """
+        try:
+            _branch, commit_sha = await cache.get_head(owner, repo)
+            audit = await cache.get_verdict(owner, repo, commit_sha, jd_hash, deep)
+        except Exception:
+            return None
+        if audit is None:
+            return None
+        return _verdict_job(audit)
+
+    async def get(self, job_id: str) -> Optional[schemas.AuditJobResponse]:
+        return await _job_response(job_id)
+
+    async def _keepalive(self):
+        """Heartbeats the jobs this process holds, then claims jobs whose process stopped heartbeating."""
+        while True:
+            try:
+                held = list(self._inflight.values())
+                if held:
+                    await _db_call(crud_async.touch_jobs, held)
+                await self._reclaim()
+            except Exception:
+                logger.exception("Audit job heartbeat failed")
+            await asyncio.sleep(JOB_STALE_SECONDS / 3)
+
+    async def _reclaim(self):
+        cutoff = _stale_cutoff()
+        for job in await _db_call(crud_async.get_stale_jobs, cutoff):
+            async with self._lock:
+                if not await _db_call(crud_async.claim_job, job.id, cutoff):
+                    continue
+                replacement = self._inflight.get(job.dedupe_key)
+                if replacement:
+                    # A fresh submission for the same repo + JD is already running here
+                    await self._fail(job.id, f"Abandoned by its worker; superseded by job {replacement}.", 500)
+                    continue
+                logger.info("Resuming abandoned audit job %s", job.id)
+                self._inflight[job.dedupe_key] = job.id
+                self._queue.put_nowait(job.id)
+
+    async def _worker(self):
+        # A worker must outlive any single job, including DB errors while recording it
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except Exception:
+                logger.exception("Audit worker failed on job %s", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _fail(self, job_id: str, error: str, error_status: int):
+        """Best effort: the job is already lost if even this write fails."""
+        try:
+            await _db_call(crud_async.update_job, job_id, status="failed", error=error, error_status=error_status)
+        except Exception:
+            logger.exception("Could not mark audit job %s as failed", job_id)
+
+    async def _process(self, job_id: str):
+        dedupe_key = None
+        try:
+            job = await _db_call(crud_async.get_job, job_id)
+            if job is None:
+                return
+            dedupe_key = job.dedupe_key
+            try:
+                await _db_call(crud_async.update_job, job_id, status="running")
+                with metrics.span("audit", repo_url=job.repo_url):
+                    audit = await run_audit_pipeline(job.repo_url, job.job_description, job.force_reaudit, bool(job.deep))
+                await _db_call(crud_async.update_job, job_id, status="completed", audit_id=audit.id)
+            except HTTPException as e:
+                await self._fail(job_id, str(e.detail), e.status_code)
+            except GitHubRateLimited as e:
+                await self._fail(job_id, str(e), 429)
+            except Exception:
+                logger.exception("Audit job %s crashed", job_id)
+                await self._fail(job_id, "Internal error while auditing.", 500)
+        finally:
+            # Even if the job row couldn't be read, later submits must not join a dead job
+            if dedupe_key is None:
+                dedupe_key = next((key for key, value in self._inflight.items() if value == job_id), None)
+            if dedupe_key is not None and self._inflight.get(dedupe_key) == job_id:
+                self._inflight.pop(dedupe_key, None)
+
+job_queue = JobQueue()
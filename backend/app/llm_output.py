@@ -0,0 +1,73 @@
+import json
+from typing import Optional
+from pydantic import ValidationError
+
+from . import schemas
+
+class LLMOutputError(ValueError):
+    """The LLM answered, but not with a usable verdict."""
+
+class JSONObjectExtractor:
+    """
+    Incrementally finds the first balanced {...} object in streamed text.
+    Prose or markdown fences around the object are ignored, and braces inside
+    JSON strings (including escaped quotes) don't count towards nesting.
+    feed() returns the object's source text as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self.result: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.done:
+            return self.result
+        begin = 0 if self._started else None
+        for i, ch in enumerate(chunk):
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+                begin = i
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[begin:i + 1])
+                    self.result = "".join(self._parts)
+                    return self.result
+        if begin is not None:
+            self._parts.append(chunk[begin:])
+        return None
+
+def extract_json_object(text: str) -> str:
+    extractor = JSONObjectExtractor()
+    if extractor.feed(text) is None:
+        raise LLMOutputError("No complete JSON object in the LLM response.")
+    return extractor.result
+
+def parse_verdict(text: str) -> dict:
+    """First balanced JSON object in the text, validated against AuditVerdict."""
+    try:
+        raw = json.loads(extract_json_object(text))
+        return schemas.AuditVerdict.model_validate(raw).model_dump()
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise LLMOutputError(str(e)) from e
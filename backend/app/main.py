@@ -1,22 +1,46 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from dotenv import load_dotenv
 from typing import List, Optional
 
-from . import crud, models, schemas
-from .database import engine, get_db
-from .utils import fetch_repo_metadata
-from .service import generate_audit_report
+from . import crud_async, schemas
+from . import metrics, migrations, webhooks
+from .database import async_engine, engine, get_async_db
+from .github import close_client
+from .batch import run_batch
+from .jobs import job_queue
+from .stream import stream_audit
+from .ratelimit import GitHubRateLimited
 
 load_dotenv()
-models.Base.metadata.create_all(bind=engine)
+
+# Schema migrations on startup. The gunicorn launcher runs them once in the
+# master (see gunicorn.conf.py) and turns this off for its workers.
+DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "true").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_INIT_ON_STARTUP:
+        await run_in_threadpool(migrations.run, engine)
+    metrics.start_sharing()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    metrics.stop_sharing()
+    # Release the pooled GitHub and database connections
+    await close_client()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="SpartanAudit API",
     description="Automated Code Quality & Relevancy Screener.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Parse CORS origins from environment variable
@@ -35,56 +59,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(GitHubRateLimited)
+async def github_rate_limited_handler(request: Request, exc: GitHubRateLimited):
+    # Throttling is surfaced explicitly instead of producing an empty audit
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={"detail": str(exc), "retry_after": exc.retry_after, "reset_at": exc.reset_at},
+    )
+
 @app.api_route("/", methods=["GET", "HEAD"])
 async def health_check():
     return {"status": "ok", "message": "SpartanAudit backend is running"}
 
-@app.post("/audit/", response_model=schemas.AuditResponse, status_code=201)
-def run_audit(req: schemas.AuditRequest):
-    repo_url_str = str(req.repo_url)
-    
-    # --- CACHING CHECK (Short Session) ---
-    if not req.force_reaudit:
-        db = next(get_db())
-        try:
-            existing_audit = crud.get_audit_by_url(db, repo_url=repo_url_str)
-            if existing_audit:
-                return existing_audit
-        finally:
-            db.close()
-    
-    # Metadata gathering (Reconnaissance) - NO DB CONNECTION HELD
-    metadata = fetch_repo_metadata(repo_url_str)
-    
-    # AI Assessment - NO DB CONNECTION HELD (Can take 30+ seconds)
-    llm_result = generate_audit_report(metadata, req.job_description)
-    
-    audit_data = schemas.AuditCreate(
-        repo_url=repo_url_str,
-        job_description=req.job_description,
-        engineering_score=llm_result["engineering_score"],
-        match_score=llm_result.get("match_score"),
-        critique=llm_result["critique"],
-        verdict=llm_result["verdict"],
-        found_files=metadata["found_files"],
-        readme_content=metadata["readme_content"],
-        tech_stack=llm_result.get("tech_stack_inferred", metadata["tech_stack"])
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Prometheus scrape target: phase timings, GitHub requests, cache lookups, LLM tokens (all workers, see METRICS_DIR)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/audit/", response_model=schemas.AuditJobResponse, status_code=202)
+async def run_audit(req: schemas.AuditRequest):
+    # Reconnaissance + LLM can take 30+ seconds: enqueue and let the client poll
+    return await job_queue.submit(req)
+
+@app.post("/audit/batch")
+async def run_audit_batch(req: schemas.BatchAuditRequest):
+    # NDJSON: one "result" line per repo as it finishes, then one ranked "shortlist" line
+    return StreamingResponse(run_batch(req), media_type="application/x-ndjson")
+
+@app.post("/audit/stream")
+async def run_audit_stream(req: schemas.AuditRequest):
+    # Server-Sent Events: progress per phase, LLM tokens, then the verdict as the last event
+    return StreamingResponse(
+        stream_audit(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    
-    # --- COMMIT TO DB (Fresh Session) ---
-    db = next(get_db())
+
+@app.post("/webhooks/github", response_model=schemas.WebhookResult, status_code=202)
+async def github_webhook(request: Request):
+    # Push events patch stored recon and re-score only what changed (see webhooks.handle_push)
+    body = await request.body()
+    webhooks.verify_signature(body, request.headers.get("X-Hub-Signature-256"))
+    return await webhooks.handle_delivery(request.headers.get("X-GitHub-Event", ""), body)
+
+@app.get("/audit/jobs/{job_id}", response_model=schemas.AuditJobResponse)
+async def get_audit_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Audit job not found")
+    return job
+
+@app.get("/history/", response_model=schemas.HistoryPage)
+async def get_history(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    verdict: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    owner: Optional[str] = None,
+    file: Optional[List[str]] = Query(None), # e.g. ?file=Dockerfile&tech=Go
+    tech: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
     try:
-        return crud.create_audit(db=db, audit_data=audit_data)
-    finally:
-        db.close()
+        rows, next_cursor = await crud_async.get_audit_summaries(
+            db, cursor=cursor, limit=limit, verdict=verdict,
+            min_score=min_score, max_score=max_score, owner=owner,
+            files=file, techs=tech,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": rows, "next_cursor": next_cursor}
+
+@app.get("/search/", response_model=schemas.SearchResponse)
+async def search_audits(
+    q: str = Query(..., min_length=1, max_length=200),
+    verdict: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    tech: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await crud_async.search_audits(
+        db, q, verdict=verdict, min_score=min_score, max_score=max_score,
+        techs=tech, limit=limit, offset=offset,
+    )
 
-@app.get("/history/", response_model=List[schemas.AuditResponse])
-def get_history(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
-    return crud.get_audits(db=db, skip=skip, limit=limit)
+@app.post("/rank/", response_model=schemas.RankResponse)
+async def rank_audits(req: schemas.RankRequest, db: AsyncSession = Depends(get_async_db)):
+    # Whole archive vs a JD by README + tech stack similarity; no LLM call (see embeddings.py)
+    items = await crud_async.rank_audits(db, req.job_description, limit=req.limit, min_similarity=req.min_similarity)
+    return {"items": items}
 
 @app.get("/audit/{audit_id}", response_model=schemas.AuditResponse)
-def get_audit(audit_id: int, db: Session = Depends(get_db)):
-    db_audit = crud.get_audit(db, audit_id=audit_id)
+async def get_audit(audit_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_audit = await crud_async.get_audit(db, audit_id=audit_id)
     if not db_audit:
         raise HTTPException(status_code=404, detail="Audit not found")
     return db_audit
\ No newline at end of file
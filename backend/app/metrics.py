@@ -0,0 +1,217 @@
+import os
+import glob
+import json
+import time
+import uuid
+import bisect
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError: # Optional: phases are still timed into spartan_phase_seconds without it
+    otel_trace = None
+
+# Label values in a fixed order, so they can key a dict
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+class Histogram:
+    """Bucketed distribution (count, sum, cumulative buckets), optionally split by labels."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self._series: Dict[LabelKey, List[float]] = {} # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def total(self, **labels) -> float:
+        series = self._series.get(_label_key(labels))
+        return series[-1] if series else 0.0
+
+    def samples(self) -> Dict[LabelKey, List[float]]:
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+REGISTRY: List[object] = []
+
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# --- AUDIT PHASES ---
+phase_seconds = Histogram("spartan_phase_seconds", "Wall time per audit phase (see metrics.span).", PHASE_BUCKETS)
+
+_tracer = otel_trace.get_tracer("spartanaudit") if otel_trace else None
+
+@contextmanager
+def span(phase: str, **attributes):
+    """
+    Times one audit phase into spartan_phase_seconds{phase, status}. If opentelemetry
+    is installed, the phase is also an OpenTelemetry span (exported once an SDK is
+    configured), so the phases of one audit nest into a single trace.
+    """
+    status = "ok"
+    start = time.perf_counter()
+    with _tracer.start_as_current_span(phase, attributes=attributes) if _tracer else nullcontext():
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            phase_seconds.observe(time.perf_counter() - start, phase=phase, status=status)
+
+# --- GITHUB + CACHE ---
+github_requests = Counter("spartan_github_requests_total", "GitHub HTTP requests by endpoint and status (304 = ETag hit, error = transport failure).")
+cache_lookups = Counter("spartan_cache_lookups_total", "Recon/verdict/HEAD cache lookups by the tier that answered (lru, shared, db) or miss.")
+
+# --- LLM ---
+llm_prompt_tokens = Histogram("spartan_llm_prompt_tokens", "Prompt (input) tokens per LLM call.", TOKEN_BUCKETS)
+llm_completion_tokens = Histogram("spartan_llm_completion_tokens", "Completion (output) tokens per LLM call.", TOKEN_BUCKETS)
+llm_call_seconds = Histogram("spartan_llm_call_seconds", "Wall time per LLM call.", LATENCY_BUCKETS)
+
+# --- WEBHOOKS ---
+webhook_pushes = Counter("spartan_webhook_pushes_total", "Push webhooks by outcome (ignored/untracked/carried/rescored).")
+
+# --- MULTI-PROCESS ---
+# Under gunicorn each worker counts on its own, so a scrape answered by one worker
+# would see counters jump backwards. With METRICS_DIR set, every process writes its
+# samples there (every METRICS_FLUSH_SECONDS, and on each scrape it answers) and
+# /metrics sums all the files. Files of exited workers stay, so totals never drop;
+# gunicorn.conf.py empties the directory when the server starts.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+_snapshot_path = None
+_snapshot_lock = threading.Lock() # The flush thread and a scrape may write at once
+_stop_flushing = threading.Event()
+
+def _write_snapshot():
+    snapshot = {metric.name: [[key, sample] for key, sample in metric.samples().items()] for metric in REGISTRY}
+    temporary = f"{_snapshot_path}.tmp"
+    with _snapshot_lock:
+        with open(temporary, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, _snapshot_path) # Readers never see a partial file
+
+def _flush_loop():
+    while not _stop_flushing.wait(METRICS_FLUSH_SECONDS):
+        try:
+            _write_snapshot()
+        except OSError:
+            pass
+
+def start_sharing():
+    """Starts writing this process's samples to METRICS_DIR (no-op without it). Call once per process, after forking."""
+    global _snapshot_path
+    if not METRICS_DIR or _snapshot_path:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    # Unique per process start, so a recycled pid never overwrites a dead worker's totals
+    _snapshot_path = os.path.join(METRICS_DIR, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+    _stop_flushing.clear()
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+def stop_sharing():
+    if _snapshot_path:
+        _stop_flushing.set()
+        _write_snapshot()
+
+def _shared_samples() -> Dict[str, Dict[LabelKey, object]]:
+    """Samples of every process in METRICS_DIR, summed per metric and label set."""
+    _write_snapshot()
+    merged: Dict[str, Dict[LabelKey, object]] = {metric.name: {} for metric in REGISTRY}
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, series in snapshot.items():
+            totals = merged.get(name)
+            if totals is None:
+                continue # Metric no longer registered
+            for key, sample in series:
+                key = tuple(tuple(pair) for pair in key)
+                current = totals.get(key)
+                if isinstance(sample, list):
+                    totals[key] = sample if current is None else [a + b for a, b in zip(current, sample)]
+                else:
+                    totals[key] = sample + (current or 0.0)
+    return merged
+
+# --- EXPOSITION ---
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _labels(key: LabelKey, *extra: Tuple[str, str]) -> str:
+    pairs = (*key, *extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def render() -> str:
+    """
+    Every registered metric in the Prometheus text exposition format (served at /metrics),
+    summed over all processes when METRICS_DIR is shared.
+    """
+    shared = _shared_samples() if _snapshot_path else None
+    lines = []
+    for metric in REGISTRY:
+        kind = "counter" if isinstance(metric, Counter) else "histogram"
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {kind}")
+        samples = shared[metric.name] if shared is not None else metric.samples()
+        for key, sample in sorted(samples.items()):
+            if kind == "counter":
+                lines.append(f"{metric.name}{_labels(key)} {_number(sample)}")
+                continue
+            cumulative = 0.0
+            for bound, n in zip((*metric.buckets, None), sample[:-1]):
+                cumulative += n
+                le = "+Inf" if bound is None else _number(bound)
+                lines.append(f"{metric.name}_bucket{_labels(key, ('le', le))} {_number(cumulative)}")
+            lines.append(f"{metric.name}_sum{_labels(key)} {_number(sample[-1])}")
+            lines.append(f"{metric.name}_count{_labels(key)} {_number(cumulative)}")
+    return "\n".join(lines) + "\n"
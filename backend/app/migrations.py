@@ -0,0 +1,200 @@
+from datetime import datetime, timezone
+from sqlalchemy import MetaData, Table, insert, inspect, select, text, update
+from sqlalchemy.engine import Engine
+
+from . import embeddings, models, search
+from .cache import hash_job_description, repo_key
+from .crud import audit_children, hash_readme
+from .utils import parse_repo_url
+
+# Flat audit columns replaced by blob/child tables (see _normalize_audit_storage)
+LEGACY_AUDIT_COLUMNS = ("job_description", "readme_content", "found_files", "tech_stack")
+MIGRATION_BATCH_SIZE = 500
+
+def _add_missing_columns(engine: Engine):
+    """
+    create_all() never alters an existing table, so columns added to a model
+    after the table was first created are appended here (always nullable).
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+
+def _create_missing_indexes(engine: Engine):
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def _set_job_audit_ondelete(engine: Engine):
+    """
+    audit_jobs.audit_id was created without ON DELETE, so deleting an audit a job points
+    at failed. Postgres swaps the constraint in place; SQLite can't alter constraints, so
+    the (small) jobs table is rebuilt from the model and its rows copied over.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table("audit_jobs"):
+        return
+    foreign_key = next((fk for fk in inspector.get_foreign_keys("audit_jobs") if fk["constrained_columns"] == ["audit_id"]), None)
+    if foreign_key is None or (foreign_key.get("options") or {}).get("ondelete", "").upper() == "SET NULL":
+        return
+    jobs = models.AuditJob.__table__
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text(f'ALTER TABLE audit_jobs DROP CONSTRAINT "{foreign_key["name"]}"'))
+            conn.execute(text(
+                f'ALTER TABLE audit_jobs ADD CONSTRAINT "{foreign_key["name"]}" '
+                "FOREIGN KEY (audit_id) REFERENCES audits (id) ON DELETE SET NULL"
+            ))
+        elif engine.dialect.name == "sqlite":
+            columns = ", ".join(col["name"] for col in inspector.get_columns("audit_jobs") if col["name"] in jobs.c)
+            indexes = [index["name"] for index in inspector.get_indexes("audit_jobs")]
+            conn.execute(text("ALTER TABLE audit_jobs RENAME TO audit_jobs_old"))
+            for name in indexes:
+                conn.execute(text(f'DROP INDEX "{name}"'))
+            jobs.create(conn)
+            conn.execute(text(f"INSERT INTO audit_jobs ({columns}) SELECT {columns} FROM audit_jobs_old"))
+            conn.execute(text("DROP TABLE audit_jobs_old"))
+
+def _normalize_audit_storage(engine: Engine):
+    """
+    Moves README/JD bodies out of audits into content-hashed blob tables and
+    found_files/tech_stack JSON into audit_files/audit_tech rows, then drops
+    the old columns. Runs in batches of MIGRATION_BATCH_SIZE audits; a no-op
+    once the columns are gone.
+    """
+    existing = {col["name"] for col in inspect(engine).get_columns("audits")}
+    legacy = [name for name in LEGACY_AUDIT_COLUMNS if name in existing]
+    if not legacy:
+        return
+
+    audits = Table("audits", MetaData(), autoload_with=engine)
+    readme_blobs = models.ReadmeBlob.__table__
+    jd_blobs = models.JobDescriptionBlob.__table__
+    columns = [audits.c.id, audits.c.jd_hash, *(audits.c[name] for name in legacy)]
+
+    with engine.begin() as conn:
+        seen_readmes = set(conn.execute(select(readme_blobs.c.hash)).scalars())
+        seen_jds = set(conn.execute(select(jd_blobs.c.hash)).scalars())
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(*columns).where(audits.c.id > last_id).order_by(audits.c.id).limit(MIGRATION_BATCH_SIZE)
+            ).mappings().all()
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+
+            new_readmes, new_jds, files, techs = {}, {}, [], []
+            for row in rows:
+                values = {}
+                jd = row.get("job_description")
+                jd_hash = row["jd_hash"] or hash_job_description(jd)
+                values["jd_hash"] = jd_hash
+                if jd_hash not in seen_jds:
+                    seen_jds.add(jd_hash)
+                    new_jds[jd_hash] = jd or ""
+                readme = row.get("readme_content")
+                if readme:
+                    values["readme_hash"] = hash_readme(readme)
+                    if values["readme_hash"] not in seen_readmes:
+                        seen_readmes.add(values["readme_hash"])
+                        new_readmes[values["readme_hash"]] = readme
+
+                audit_files, audit_techs = audit_children(row.get("found_files") or [], row.get("tech_stack") or [])
+                files += [{"audit_id": row["id"], "path": f.path, "name": f.name} for f in audit_files]
+                techs += [{"audit_id": row["id"], "name": t.name, "name_key": t.name_key} for t in audit_techs]
+                conn.execute(update(audits).where(audits.c.id == row["id"]).values(**values))
+
+            if new_readmes:
+                conn.execute(insert(readme_blobs), [{"hash": h, "body": b} for h, b in new_readmes.items()])
+            if new_jds:
+                conn.execute(insert(jd_blobs), [{"hash": h, "body": b} for h, b in new_jds.items()])
+            if files:
+                conn.execute(insert(models.AuditFile.__table__), files)
+            if techs:
+                conn.execute(insert(models.AuditTech.__table__), techs)
+
+        for name in legacy:
+            conn.execute(text(f"ALTER TABLE audits DROP COLUMN {name}"))
+
+def _backfill_audits(engine: Engine):
+    """
+    Audits stored before repo_owner/repo_name existed get them parsed from repo_url,
+    and any row without created_at gets one, since history pages are keyed on it.
+    """
+    audits = models.Audit.__table__
+    with engine.begin() as conn:
+        # Client-side, so the value is stored in the same format as the ORM writes it
+        conn.execute(update(audits).where(audits.c.created_at.is_(None)).values(created_at=datetime.now(timezone.utc)))
+        if engine.dialect.name == "sqlite":
+            # SQLite DATETIME is text: CURRENT_TIMESTAMP rows ("... 01:35:47") sort before their own
+            # history cursor, bound as "... 01:35:47.000000", so pages would repeat. Give them microseconds.
+            conn.execute(text("UPDATE audits SET created_at = created_at || '.000000' WHERE length(created_at) = 19"))
+        rows = conn.execute(select(audits.c.id, audits.c.repo_url).where(audits.c.repo_owner.is_(None))).all()
+        for audit_id, repo_url in rows:
+            parsed = parse_repo_url(repo_url)
+            if parsed:
+                owner, repo = repo_key(*parsed)
+                conn.execute(update(audits).where(audits.c.id == audit_id).values(repo_owner=owner, repo_name=repo))
+
+def _drop_orphans(engine: Engine):
+    """
+    Child rows of audits deleted while SQLite foreign keys were off (they were never
+    enabled before) would attach to new audits reusing those ids. Other backends cascade.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    audits = models.Audit.__table__
+    with engine.begin() as conn:
+        for child in (models.AuditFile.__table__, models.AuditTech.__table__, models.AuditVector.__table__):
+            conn.execute(child.delete().where(~select(audits.c.id).where(audits.c.id == child.c.audit_id).exists()))
+
+def _backfill_vectors(engine: Engine):
+    """Computes the pre-ranking vector of every audit stored without one (or with another EMBEDDING_DIM)."""
+    audits, vectors = models.Audit.__table__, models.AuditVector.__table__
+    readmes, techs = models.ReadmeBlob.__table__, models.AuditTech.__table__
+    with engine.begin() as conn:
+        conn.execute(vectors.delete().where(vectors.c.dim != embeddings.EMBEDDING_DIM))
+        last_id = 0
+        while True:
+            # Keyset batches, so only MIGRATION_BATCH_SIZE README bodies are in memory at once
+            chunk = conn.execute(
+                select(audits.c.id, readmes.c.body)
+                .outerjoin(readmes, readmes.c.hash == audits.c.readme_hash)
+                .where(audits.c.id > last_id)
+                .where(~select(vectors.c.audit_id).where(vectors.c.audit_id == audits.c.id).exists())
+                .order_by(audits.c.id).limit(MIGRATION_BATCH_SIZE)
+            ).all()
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            stacks = {}
+            for audit_id, name in conn.execute(
+                select(techs.c.audit_id, techs.c.name).where(techs.c.audit_id.in_([row[0] for row in chunk]))
+            ):
+                stacks.setdefault(audit_id, []).append(name)
+            conn.execute(insert(vectors), [
+                {"audit_id": audit_id, "dim": embeddings.EMBEDDING_DIM,
+                 "vector": embeddings.encode(embeddings.embed_repo(readme, stacks.get(audit_id, [])))}
+                for audit_id, readme in chunk
+            ])
+
+def run(engine: Engine):
+    """Brings the schema up to date. Idempotent; safe to call on every start."""
+    models.Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    _create_missing_indexes(engine)
+    _set_job_audit_ondelete(engine)
+    _normalize_audit_storage(engine)
+    _backfill_audits(engine)
+    _drop_orphans(engine)
+    search.ensure_index(engine)
+    _backfill_vectors(engine)
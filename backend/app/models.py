@@ -1,13 +1,38 @@
-from sqlalchemy import Column, Integer, String, JSON, Text, Float, DateTime
+from sqlalchemy import Column, Integer, String, JSON, Text, Float, DateTime, Boolean, ForeignKey, Index, LargeBinary, UniqueConstraint
+from datetime import datetime, timezone
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+class ReadmeBlob(Base):
+    """README text stored once per distinct content (sha256 of the exact text)."""
+    __tablename__ = "readme_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    body = Column(Text, nullable=False)
+
+class JobDescriptionBlob(Base):
+    """JD text stored once per jd_hash (whitespace-normalized sha256, see cache.hash_job_description)."""
+    __tablename__ = "job_descriptions"
+
+    hash = Column(String(64), primary_key=True)
+    body = Column(Text, nullable=False)
+
 class Audit(Base):
     __tablename__ = "audits"
 
     id = Column(Integer, primary_key=True, index=True)
     repo_url = Column(String, index=True, nullable=False)
-    job_description = Column(Text)
+    
+    # Cache key: the same commit audited against the same JD yields the same verdict
+    repo_owner = Column(String)
+    repo_name = Column(String)
+    commit_sha = Column(String(40))
+    jd_hash = Column(String(64), ForeignKey("job_descriptions.hash"))
+    deep = Column(Boolean, default=False) # Scored with deep reconnaissance signals (see deep.py)
     
     # Audit Results
     engineering_score = Column(Float)
@@ -15,9 +40,123 @@ class Audit(Base):
     critique = Column(Text)
     verdict = Column(String) # "HIRE THIS SPARTAN", etc.
     
-    # Metadata and Reconnaissance data
-    found_files = Column(JSON) # List of files detected (README, Dockerfile, etc.)
-    readme_content = Column(Text)
-    tech_stack = Column(JSON) # Detected languages/frameworks
+    # Reconnaissance data lives in blob/child tables, shared and indexed
+    readme_hash = Column(String(64), ForeignKey("readme_blobs.hash"))
+    
+    # Set client-side too, so it round-trips exactly into history cursors on every backend
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+
+    jd = relationship(JobDescriptionBlob, lazy="joined")
+    readme = relationship(ReadmeBlob) # Loaded only when readme_content is read
+    files = relationship("AuditFile", lazy="selectin", order_by="AuditFile.id", cascade="all, delete-orphan")
+    techs = relationship("AuditTech", lazy="selectin", order_by="AuditTech.id", cascade="all, delete-orphan")
+    vector = relationship("AuditVector", uselist=False, lazy="raise", cascade="all, delete-orphan", passive_deletes=True) # Written, never read per audit
+
+    __table_args__ = (
+        Index("ix_audits_verdict_cache", "repo_owner", "repo_name", "commit_sha", "jd_hash"),
+        # Keyset pagination for /history/ (newest first), alone or with a filter
+        Index("ix_audits_created_id", "created_at", "id"),
+        Index("ix_audits_verdict_created_id", "verdict", "created_at", "id"),
+        Index("ix_audits_owner_created_id", "repo_owner", "created_at", "id"),
+        Index("ix_audits_engineering_score", "engineering_score"),
+    )
+
+    # The original flat fields, so AuditResponse keeps its shape
+    @property
+    def job_description(self):
+        return (self.jd.body or None) if self.jd else None
+
+    @property
+    def readme_content(self):
+        return self.readme.body if self.readme else None
+
+    @property
+    def found_files(self):
+        return [f.path for f in self.files]
+
+    @property
+    def tech_stack(self):
+        return [t.name for t in self.techs]
+
+class AuditFile(Base):
+    """One detected artifact of an audit; indexed by file name for "audits with a Dockerfile" lookups."""
+    __tablename__ = "audit_files"
+
+    id = Column(Integer, primary_key=True)
+    audit_id = Column(Integer, ForeignKey("audits.id", ondelete="CASCADE"), nullable=False)
+    path = Column(String, nullable=False)
+    name = Column(String, nullable=False) # Basename of path
+
+    __table_args__ = (
+        Index("ix_audit_files_audit", "audit_id"),
+        Index("ix_audit_files_name_audit", "name", "audit_id"),
+    )
+
+class AuditTech(Base):
+    """One technology of an audit's tech stack; indexed case-insensitively via name_key."""
+    __tablename__ = "audit_tech"
+
+    id = Column(Integer, primary_key=True)
+    audit_id = Column(Integer, ForeignKey("audits.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    name_key = Column(String, nullable=False) # name.lower()
+
+    __table_args__ = (
+        Index("ix_audit_tech_audit", "audit_id"),
+        Index("ix_audit_tech_key_audit", "name_key", "audit_id"),
+    )
+
+class AuditVector(Base):
+    """Pre-ranking vector of an audit's README + tech stack (see embeddings.py), float32 bytes."""
+    __tablename__ = "audit_vectors"
+
+    audit_id = Column(Integer, ForeignKey("audits.id", ondelete="CASCADE"), primary_key=True)
+    dim = Column(Integer, nullable=False) # EMBEDDING_DIM it was computed with
+    vector = Column(LargeBinary, nullable=False)
+
+class CarriedVerdict(Base):
+    """
+    A verdict still valid at a later commit: a push left its audited artifacts unchanged.
+    Points at the audit instead of copying it, so history, search and ranking list it once.
+    """
+    __tablename__ = "carried_verdicts"
+
+    repo_owner = Column(String, primary_key=True)
+    repo_name = Column(String, primary_key=True)
+    commit_sha = Column(String(40), primary_key=True)
+    audit_id = Column(Integer, ForeignKey("audits.id", ondelete="CASCADE"), primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ReconSnapshot(Base):
+    """Reconnaissance output for one commit. A tree at a fixed SHA never changes, so rows are never invalidated."""
+    __tablename__ = "recon_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    repo_owner = Column(String, nullable=False)
+    repo_name = Column(String, nullable=False)
+    commit_sha = Column(String(40), nullable=False)
+    payload = Column(JSON, nullable=False) # fetch_repo_metadata() result
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("repo_owner", "repo_name", "commit_sha", name="uq_recon_snapshots_commit"),
+    )
+
+class AuditJob(Base):
+    """A queued /audit/ request. Rows survive restarts so unfinished jobs are picked up again."""
+    __tablename__ = "audit_jobs"
+
+    id = Column(String(32), primary_key=True) # uuid4 hex
+    status = Column(String(16), nullable=False, default="queued") # queued | running | completed | failed
+    repo_url = Column(String, nullable=False)
+    job_description = Column(Text)
+    force_reaudit = Column(Boolean, default=False)
+    deep = Column(Boolean, default=False)
+    dedupe_key = Column(String, index=True) # owner/repo/jd_hash - identical submissions share one job
+    
+    audit_id = Column(Integer, ForeignKey("audits.id", ondelete="SET NULL")) # Jobs outlive a deleted audit
+    error = Column(Text)
+    error_status = Column(Integer) # HTTP status the synchronous endpoint would have returned
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,107 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+# Vendored / generated directories never count as "Proof of Engineering"
+IGNORED_DIRS = ["node_modules", "vendor", "site-packages", ".venv", "venv", "__pycache__", ".git", "dist", "build"]
+
+_GLOB_CHARS = set("*?[")
+
+def _is_glob(pattern: str) -> bool:
+    return any(ch in _GLOB_CHARS for ch in pattern)
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translates a glob into a regex fragment where wildcards never cross a '/'.
+    (fnmatch.translate lets '*' swallow directory separators, which would make
+    'migrations/*.py' match 'migrations/a/b/c.py'.)
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "*":
+            out.append("[^/]*")
+        elif ch == "?":
+            out.append("[^/]")
+        elif ch == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return "".join(out)
+
+class PatternMatcher:
+    """
+    Precompiled classifier for FILES_TO_CHECK-style categories.
+
+    Every pattern is sorted into the cheapest structure that can answer it:
+    - exact basenames ("Dockerfile")      -> hash lookup, case-insensitive
+    - extension globs ("*.ipynb")         -> hash lookup on the file's suffixes
+    - anything else ("migrations/*.py")   -> ONE compiled regex union per category
+
+    classify() therefore does a constant amount of work per path, so a 100k-file
+    monorepo listing is bucketed in a single linear pass.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], ignored_dirs: Iterable[str] = IGNORED_DIRS):
+        self.categories = list(categories)
+        self._basenames: Dict[str, Set[str]] = {}
+        self._extensions: Dict[str, Set[str]] = {}
+        self._regexes = {}
+
+        for category, patterns in categories.items():
+            alternatives = []
+            for pattern in patterns:
+                if "/" not in pattern and not _is_glob(pattern):
+                    self._basenames.setdefault(pattern.lower(), set()).add(category)
+                elif "/" not in pattern and pattern.startswith("*.") and not _is_glob(pattern[2:]):
+                    self._extensions.setdefault(pattern[2:].lower(), set()).add(category)
+                elif pattern.startswith(".github/"):
+                    # .github lives at the repository root only
+                    alternatives.append("^" + glob_to_regex(pattern) + "$")
+                else:
+                    alternatives.append("(?:^|/)" + glob_to_regex(pattern) + "$")
+            if alternatives:
+                self._regexes[category] = re.compile("|".join(alternatives))
+
+        ignored = "|".join(re.escape(d) for d in ignored_dirs)
+        self._ignored = re.compile(f"(?:^|/)(?:{ignored})/") if ignored else None
+
+    def ignored(self, path: str) -> bool:
+        """True for paths inside vendored / generated directories."""
+        return bool(self._ignored and self._ignored.search(path))
+
+    def match(self, path: str) -> Set[str]:
+        """Returns the set of categories a single path belongs to."""
+        if self.ignored(path):
+            return set()
+
+        basename = path.rsplit("/", 1)[-1]
+        hits = set(self._basenames.get(basename.lower(), ()))
+
+        # "a.tar.gz" is looked up as both "tar.gz" and "gz"
+        dot = basename.find(".", 1)
+        while dot != -1:
+            hits.update(self._extensions.get(basename[dot + 1:].lower(), ()))
+            dot = basename.find(".", dot + 1)
+
+        for category, regex in self._regexes.items():
+            if category not in hits and regex.search(path):
+                hits.add(category)
+        return hits
+
+    def classify(self, paths: Iterable[str]) -> Dict[str, List[str]]:
+        """Buckets a file listing into categories in one pass."""
+        matches = {category: [] for category in self.categories}
+        for path in paths:
+            for category in self.match(path):
+                matches[category].append(path)
+        return matches
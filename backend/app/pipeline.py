@@ -0,0 +1,104 @@
+import asyncio
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+
+from . import cache, crud_async, metrics, schemas
+from .database import AsyncSessionLocal
+from .deep import fetch_deep_signals
+from .service import generate_audit_report
+from .utils import fetch_repo_metadata, require_repo, resolve_head
+
+async def _store_audit(audit_data: schemas.AuditCreate) -> schemas.AuditResponse:
+    async with AsyncSessionLocal() as db:
+        return schemas.AuditResponse.model_validate(await crud_async.create_audit(db=db, audit_data=audit_data))
+
+async def get_reconnaissance(repo_url: str, owner: str, repo: str, commit_sha: str, progress=None, deep: bool = False) -> dict:
+    """
+    Recon for a commit: in-process LRU -> recon_snapshots table -> GitHub.
+    With deep, the snapshot also carries "deep_signals" (deep.fetch_deep_signals); a cold
+    deep audit streams the archive alongside the tree crawl. Shallow callers never see them.
+    """
+    with metrics.span("recon"):
+        metadata = await cache.get_recon(owner, repo, commit_sha)
+        if metadata is None:
+            if deep:
+                metadata, signals = await asyncio.gather(
+                    fetch_repo_metadata(repo_url, commit_sha=commit_sha, progress=progress),
+                    fetch_deep_signals(owner, repo, commit_sha),
+                )
+                if signals is not None:
+                    metadata = {**metadata, "deep_signals": signals}
+            else:
+                metadata = await fetch_repo_metadata(repo_url, commit_sha=commit_sha, progress=progress)
+            await cache.put_recon(owner, repo, commit_sha, metadata)
+        elif deep and "deep_signals" not in metadata:
+            signals = await fetch_deep_signals(owner, repo, commit_sha)
+            if signals is not None:
+                metadata = {**metadata, "deep_signals": signals}
+                await cache.put_recon(owner, repo, commit_sha, metadata)
+
+    if not deep:
+        return {key: value for key, value in metadata.items() if key != "deep_signals"}
+    if progress and "deep_signals" in metadata:
+        signals = metadata["deep_signals"]
+        progress("deep", {key: signals[key] for key in ("files", "loc", "test_ratio", "ci_jobs", "truncated")})
+    return metadata
+
+async def run_audit_pipeline(repo_url: str, job_description: Optional[str], force_reaudit: bool = False,
+                             deep: bool = False) -> schemas.AuditResponse:
+    """
+    Full audit for a repo + JD.
+    The HEAD commit is resolved first (two cheap, ETag-cached calls); verdicts are keyed on
+    (owner, repo, sha, jd_hash), so an unchanged repo returns instantly and a pushed
+    repo is re-audited automatically. force_reaudit only skips the verdict cache:
+    reconnaissance at a fixed SHA is immutable and is always reused. deep adds the
+    archive-derived signals to the prompt and is cached as a separate verdict.
+    """
+    owner, repo = require_repo(repo_url)
+    _branch, commit_sha = await resolve_head(owner, repo)
+    jd_hash = cache.hash_job_description(job_description)
+
+    # --- VERDICT CACHE ---
+    if not force_reaudit:
+        with metrics.span("verdict_cache"):
+            cached = await cache.get_verdict(owner, repo, commit_sha, jd_hash, deep)
+        if cached:
+            return cached
+
+    # Metadata gathering (Reconnaissance) - NO DB CONNECTION HELD
+    metadata = await get_reconnaissance(repo_url, owner, repo, commit_sha, deep=deep)
+
+    # AI Assessment - NO DB CONNECTION HELD (Can take 30+ seconds), kept off the event loop
+    with metrics.span("llm"):
+        llm_result = await run_in_threadpool(generate_audit_report, metadata, job_description)
+
+    # An archive that couldn't be fetched leaves a shallow verdict; the next deep request retries it
+    deep = deep and "deep_signals" in metadata
+    return await save_audit(repo_url, job_description, metadata, llm_result, owner, repo, commit_sha, jd_hash, deep)
+
+async def save_audit(repo_url: str, job_description: Optional[str], metadata: dict, llm_result: dict,
+                     owner: str, repo: str, commit_sha: str, jd_hash: str, deep: bool = False) -> schemas.AuditResponse:
+    """Persists an LLM verdict and primes the verdict cache."""
+    key_owner, key_repo = cache.repo_key(owner, repo)
+    audit_data = schemas.AuditCreate(
+        repo_url=repo_url,
+        job_description=job_description,
+        engineering_score=llm_result["engineering_score"],
+        match_score=llm_result.get("match_score"),
+        critique=llm_result["critique"],
+        verdict=llm_result["verdict"],
+        found_files=metadata["found_files"],
+        readme_content=metadata["readme_content"],
+        tech_stack=llm_result.get("tech_stack_inferred") or metadata["tech_stack"],
+        repo_owner=key_owner,
+        repo_name=key_repo,
+        commit_sha=commit_sha,
+        jd_hash=jd_hash,
+        deep=deep,
+    )
+
+    # --- COMMIT TO DB (Fresh Session) ---
+    with metrics.span("db_commit"):
+        audit = await _store_audit(audit_data)
+        await cache.put_verdict(audit, owner, repo, commit_sha, jd_hash, deep)
+    return audit
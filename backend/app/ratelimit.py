@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+# GitHub's documented hourly quotas; the real values are read back from response headers
+AUTHENTICATED_LIMIT = 5000
+ANONYMOUS_LIMIT = 60
+
+class GitHubRateLimited(Exception):
+    """Every available token is throttled. Carries enough detail for a structured 429."""
+
+    def __init__(self, retry_after: int, reset_at: Optional[float] = None):
+        self.retry_after = max(int(retry_after), 1)
+        self.reset_at = reset_at
+        super().__init__(f"GitHub API rate limit exhausted. Retry in {self.retry_after}s.")
+
+@dataclass
+class TokenBucket:
+    """Remaining quota for one token, refilled when GitHub's reset window passes."""
+    token: Optional[str]
+    limit: int
+    remaining: int
+    reset_at: float = 0.0
+    blocked_until: float = 0.0  # set by Retry-After (secondary limits)
+
+    def available(self, now: float) -> int:
+        if now < self.blocked_until:
+            return 0
+        if self.reset_at and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0.0
+        return self.remaining
+
+    def wait_time(self, now: float) -> float:
+        waits = [t - now for t in (self.blocked_until, self.reset_at) if t > now]
+        return max(waits) if waits else 60.0
+
+def load_tokens() -> List[Optional[str]]:
+    """GITHUB_TOKENS (comma-separated) takes precedence over the single GITHUB_TOKEN; None means anonymous."""
+    raw = os.getenv("GITHUB_TOKENS") or os.getenv("GITHUB_TOKEN") or ""
+    tokens = [t.strip() for t in raw.split(",") if t.strip()]
+    return tokens or [None]
+
+class TokenPool:
+    """
+    Rotates requests across several GitHub tokens.
+    acquire() hands out the token with the most quota left and reserves one call
+    from it; update() re-syncs the bucket with X-RateLimit-* / Retry-After headers.
+    """
+
+    def __init__(self, tokens: Iterable[Optional[str]]):
+        self._lock = threading.Lock()
+        self._buckets: Dict[Optional[str], TokenBucket] = {}
+        for token in tokens:
+            limit = AUTHENTICATED_LIMIT if token else ANONYMOUS_LIMIT
+            self._buckets[token] = TokenBucket(token=token, limit=limit, remaining=limit)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, exclude: Iterable[Optional[str]] = ()) -> Optional[str]:
+        excluded = set(exclude)
+        now = time.time()
+        with self._lock:
+            candidates = [b for b in self._buckets.values() if b.token not in excluded]
+            best = max(candidates, key=lambda b: b.available(now), default=None)
+            if best is None or best.available(now) <= 0:
+                pool = candidates or list(self._buckets.values())
+                retry_after = min(b.wait_time(now) for b in pool)
+                resets = [b.reset_at for b in pool if b.reset_at]
+                raise GitHubRateLimited(retry_after=retry_after, reset_at=min(resets) if resets else None)
+            best.remaining -= 1
+            return best.token
+
+    def update(self, token: Optional[str], res: httpx.Response):
+        headers = res.headers
+        with self._lock:
+            bucket = self._buckets.get(token)
+            if bucket is None:
+                return
+            if "X-RateLimit-Limit" in headers:
+                bucket.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                bucket.reset_at = float(headers["X-RateLimit-Reset"])
+            if "Retry-After" in headers:
+                bucket.blocked_until = time.time() + float(headers["Retry-After"])
+
+def is_throttled(res: httpx.Response) -> bool:
+    """Primary limit (remaining == 0) or secondary limit (Retry-After) on a 403/429."""
+    if res.status_code not in (403, 429):
+        return False
+    return res.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in res.headers
+
+@dataclass
+class CachedResponse:
+    etag: str
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers=self.headers, content=self.content, request=request)
+
+class ETagCache:
+    """
+    LRU of successful response bodies and their ETags, bounded by total bytes.
+    Requests for a cached URL are sent with If-None-Match; GitHub answers 304
+    without spending quota and the stored body is replayed.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request: httpx.Request) -> str:
+        return f"{request.url}|{request.headers.get('Accept', '')}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, res: httpx.Response):
+        etag = res.headers.get("ETag")
+        if not etag or len(res.content) > self.max_bytes:
+            return
+        keep = {k: v for k, v in res.headers.items() if k.lower() in ("content-type", "etag")}
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.content)
+            self._entries[key] = CachedResponse(etag=etag, content=res.content, headers=keep)
+            self._size += len(res.content)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -7,6 +7,20 @@ class AuditRequest(BaseModel):
     repo_url: HttpUrl
     job_description: Optional[str] = None
     force_reaudit: Optional[bool] = False # Bypass cache if True
+    deep: Optional[bool] = False # Also stream the repo archive for LOC / tests / CI / dependency signals
+
+class BatchAuditRequest(BaseModel):
+    repo_urls: List[HttpUrl] = Field(..., min_length=1, max_length=500)
+    job_description: Optional[str] = None
+    force_reaudit: Optional[bool] = False
+    # Pre-ranking (needs a JD): only repos passing both cuts get an LLM verdict, the rest are "skipped"
+    prerank_top_k: Optional[int] = Field(None, ge=1)
+    prerank_min_similarity: Optional[float] = Field(None, ge=-1, le=1)
+
+class RankRequest(BaseModel):
+    job_description: str = Field(..., min_length=1, max_length=20000)
+    limit: int = Field(20, ge=1, le=200)
+    min_similarity: Optional[float] = Field(None, ge=-1, le=1)
 
 # --- Response Models ---
 class AuditResponse(BaseModel):
@@ -19,12 +33,116 @@ class AuditResponse(BaseModel):
     verdict: str
     found_files: List[str]
     tech_stack: List[str]
+    commit_sha: Optional[str] = None
+    deep: Optional[bool] = False
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AuditSummary(BaseModel):
+    """Slim projection for history listings; the full report lives at /audit/{id}."""
+    id: int
+    repo_url: str
+    repo_owner: Optional[str] = None
+    engineering_score: float
+    match_score: Optional[float] = None
+    verdict: str
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class HistoryPage(BaseModel):
+    items: List[AuditSummary]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page; null on the last page
+
+class SearchHit(AuditSummary):
+    rank: float
+
+class RankedAudit(AuditSummary):
+    similarity: float # Cosine similarity of README + tech stack with the JD (TF-IDF weighted)
+
+class RankResponse(BaseModel):
+    items: List[RankedAudit] # One per repo, most similar first
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class SearchFacets(BaseModel):
+    verdict: List[FacetCount]
+    tech: List[FacetCount]
+
+class SearchResponse(BaseModel):
+    total: int # Matches after filters, across all pages
+    items: List[SearchHit]
+    facets: SearchFacets
+
+class AuditJobResponse(BaseModel):
+    id: str
+    status: str # queued | running | completed | failed
+    repo_url: str
+    audit_id: Optional[int] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    audit: Optional[AuditResponse] = None # Populated once the job has completed
+
+    class Config:
+        from_attributes = True
+
+class WebhookResult(BaseModel):
+    status: str # ignored | untracked | carried | rescored
+    commit_sha: Optional[str] = None
+    categories: List[str] = [] # FILES_TO_CHECK categories touched by the push (empty after a full re-crawl)
+    artifacts_changed: bool = False
+    readme_changed: bool = False
+    carried_audit_ids: List[int] = [] # Verdicts now also valid at the new commit (no LLM call)
+    job_ids: List[str] = [] # Re-score jobs, pollable at /audit/jobs/{id}
+
+class BatchAuditItem(BaseModel):
+    index: int
+    repo_url: str
+    status: str # completed | cached | skipped | failed
+    similarity: Optional[float] = None # Pre-ranking score, when prerank_* was requested
+    audit: Optional[AuditResponse] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+
+class ShortlistEntry(BaseModel):
+    rank: int
+    repo_url: str
+    audit_id: int
+    engineering_score: float
+    match_score: Optional[float] = None
+    verdict: str
+
+class BatchShortlist(BaseModel):
+    shortlist: List[ShortlistEntry]
+    failed: List[str]
+    skipped: List[str] = [] # Cut by pre-ranking, never sent to the LLM
+
 # --- Internal Data Models ---
+VERDICTS = ("HIRE THIS SPARTAN", "GOOD DEV, WRONG FIT", "TUTORIAL HELL")
+
+class AuditVerdict(BaseModel):
+    """What the LLM must return; anything else triggers a retry of the LLM step."""
+    engineering_score: float = Field(..., ge=0, le=10)
+    match_score: Optional[float] = Field(None, ge=0, le=100)
+    critique: str = Field(..., min_length=1)
+    verdict: str
+    tech_stack_inferred: Optional[List[str]] = None # None when left out: the detected stack is kept
+
+    @field_validator("verdict")
+    @classmethod
+    def known_verdict(cls, value: str) -> str:
+        normalized = " ".join(value.upper().split())
+        if normalized not in VERDICTS:
+            raise ValueError(f"verdict must be one of {VERDICTS}")
+        return normalized
+
 class AuditCreate(BaseModel):
     repo_url: str
     job_description: Optional[str] = None
@@ -34,4 +152,9 @@ class AuditCreate(BaseModel):
     verdict: str
     found_files: List[str]
     readme_content: Optional[str] = None
-    tech_stack: List[str]
\ No newline at end of file
+    tech_stack: List[str]
+    repo_owner: Optional[str] = None
+    repo_name: Optional[str] = None
+    commit_sha: Optional[str] = None
+    jd_hash: Optional[str] = None
+    deep: bool = False
\ No newline at end of file
@@ -0,0 +1,220 @@
+import re
+from typing import List, Optional
+from sqlalchemy import Float, Integer, desc, exists, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, aliased
+
+from . import crud, models
+
+# Facet values returned per facet (most frequent first)
+FACET_LIMIT = 20
+
+# --- INDEX DDL ---
+# One search document per audit over critique, JD and README. Postgres keeps a
+# weighted tsvector behind a GIN index; SQLite (local runs) uses a contentless
+# FTS5 table keyed by rowid = audit id. Other backends fall back to LIKE.
+
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(:critique, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(:job_description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(:readme, '')), 'C')"
+)
+
+_PG_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS audit_search ("
+    " audit_id INTEGER PRIMARY KEY REFERENCES audits(id) ON DELETE CASCADE,"
+    " document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_audit_search_document ON audit_search USING GIN (document)",
+)
+
+_SQLITE_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS audit_search USING fts5("
+    "critique, job_description, readme, content='', tokenize='porter unicode61')",
+    # A contentless table can't cascade: its document is removed with the 'delete' command,
+    # which needs the indexed text back (the blobs still exist while the audit row goes)
+    "CREATE TRIGGER IF NOT EXISTS audits_search_delete AFTER DELETE ON audits BEGIN "
+    "INSERT INTO audit_search (audit_search, rowid, critique, job_description, readme) VALUES ('delete', old.id, old.critique, "
+    "(SELECT body FROM job_descriptions WHERE hash = old.jd_hash), (SELECT body FROM readme_blobs WHERE hash = old.readme_hash)); "
+    "END",
+)
+
+# Each audit's searchable text, pulled from the blob tables
+_UNINDEXED_SOURCE = """
+    SELECT a.id, a.critique, j.body, r.body
+    FROM audits a
+    LEFT JOIN job_descriptions j ON j.hash = a.jd_hash
+    LEFT JOIN readme_blobs r ON r.hash = a.readme_hash
+"""
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+def ensure_index(engine: Engine):
+    """Creates the search index if missing and indexes every audit that has no document yet."""
+    dialect = _dialect(engine)
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            for statement in _PG_SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text(
+                "INSERT INTO audit_search (audit_id, document) "
+                "SELECT a.id, "
+                "setweight(to_tsvector('english', coalesce(a.critique, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(j.body, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(r.body, '')), 'C') "
+                "FROM audits a "
+                "LEFT JOIN job_descriptions j ON j.hash = a.jd_hash "
+                "LEFT JOIN readme_blobs r ON r.hash = a.readme_hash "
+                "WHERE NOT EXISTS (SELECT 1 FROM audit_search s WHERE s.audit_id = a.id)"
+            ))
+        elif dialect == "sqlite":
+            for statement in _SQLITE_SCHEMA:
+                conn.execute(text(statement))
+            # Audits deleted before the trigger existed left documents behind; their text is gone, so reindex
+            if conn.execute(text("SELECT 1 FROM audit_search WHERE rowid NOT IN (SELECT id FROM audits) LIMIT 1")).first():
+                conn.execute(text("INSERT INTO audit_search (audit_search) VALUES ('delete-all')"))
+            # Documents are written with their audit, so only ids past the last indexed one are missing
+            conn.execute(text(
+                "INSERT INTO audit_search (rowid, critique, job_description, readme) "
+                + _UNINDEXED_SOURCE
+                + "WHERE a.id > (SELECT coalesce(max(rowid), 0) FROM audit_search) ORDER BY a.id"
+            ))
+
+def index_statement(dialect: str, audit_id: int, critique: Optional[str], job_description: Optional[str], readme: Optional[str]):
+    """INSERT of an audit's search document, or None where there is no index."""
+    params = {"audit_id": audit_id, "critique": critique, "job_description": job_description, "readme": readme}
+    if dialect == "postgresql":
+        return text(f"INSERT INTO audit_search (audit_id, document) VALUES (:audit_id, {_PG_DOCUMENT})").bindparams(**params)
+    if dialect == "sqlite":
+        return text(
+            "INSERT INTO audit_search (rowid, critique, job_description, readme) "
+            "VALUES (:audit_id, :critique, :job_description, :readme)"
+        ).bindparams(**params)
+    return None
+
+def index_audit(db: Session, audit_id: int, critique: Optional[str], job_description: Optional[str], readme: Optional[str]):
+    """Writes the search document of a new audit, in the caller's transaction."""
+    statement = index_statement(_dialect(db.get_bind()), audit_id, critique, job_description, readme)
+    if statement is not None:
+        db.execute(statement)
+
+# --- QUERY ---
+
+def _fts5_query(q: str) -> str:
+    """Free text -> FTS5 query: every word must match (quoted, so user input is never FTS syntax)."""
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"' for word in words)
+
+def _matches(dialect: str, q: str, ranked: bool = True, limit: Optional[int] = None, offset: int = 0):
+    """
+    CTE of (audit_id, rank) for audits matching q, higher rank = better.
+    Scoring every match dominates the cost, so counts and facets ask for ranked=False.
+    With a limit the text search itself returns only that page, best first.
+    """
+    if dialect == "postgresql":
+        score = "ts_rank_cd(document, query)"
+        statement = (
+            f"SELECT audit_id, {score if ranked else '0.0'} AS rank "
+            "FROM audit_search, websearch_to_tsquery('english', :q) AS query "
+            "WHERE document @@ query"
+        )
+        order, params = f"{score} DESC, audit_id DESC", {"q": q}
+    elif dialect == "sqlite":
+        score = "bm25(audit_search, 4.0, 2.0, 1.0)"  # lower = better
+        statement = (
+            f"SELECT rowid AS audit_id, {'-' + score if ranked else '0.0'} AS rank "
+            "FROM audit_search WHERE audit_search MATCH :q"
+        )
+        order, params = f"{score}, rowid DESC", {"q": _fts5_query(q)}
+    else:
+        statement = "SELECT id AS audit_id, 1.0 AS rank FROM audits WHERE lower(critique) LIKE :q"
+        order, params = "id DESC", {"q": f"%{q.lower()}%"}
+    if limit is not None:
+        statement += f" ORDER BY {order} LIMIT :limit OFFSET :offset"
+        params.update(limit=limit, offset=offset)
+    # Materialized, so the planner runs the text search once instead of once per filtered audit row
+    return text(statement).bindparams(**params).columns(audit_id=Integer, rank=Float).cte("matches").prefix_with("MATERIALIZED")
+
+EMPTY_RESULT = {"total": 0, "items": [], "facets": {"verdict": [], "tech": []}}
+
+def search_queries(dialect: str, q: str, verdict: Optional[str] = None,
+                   min_score: Optional[float] = None, max_score: Optional[float] = None,
+                   techs: Optional[List[str]] = None, limit: int = 20, offset: int = 0):
+    """
+    (items, verdict counts, tech counts) statements for a search, or None if q has no words.
+    Structured filters narrow the matches; facet counts and the total are
+    computed over the same filtered set. The page is cut from (audit_id, rank)
+    before the summary columns are joined, and straight from the text index
+    when nothing is filtered.
+    """
+    if not _fts5_query(q):
+        return None
+
+    structured = []
+    if verdict:
+        structured.append(models.Audit.verdict == verdict)
+    if min_score is not None:
+        structured.append(models.Audit.engineering_score >= min_score)
+    if max_score is not None:
+        structured.append(models.Audit.engineering_score <= max_score)
+
+    def filtered(matches, *columns, join_audits: bool = False):
+        """select(*columns) over the matches passing the filters; audits are joined only if needed."""
+        statement = select(*columns).select_from(matches)
+        if structured or join_audits:
+            statement = statement.join(models.Audit, models.Audit.id == matches.c.audit_id).where(*structured)
+        for tech in techs or ():
+            # Aliased so the tech facet query (which selects from audit_tech) doesn't correlate it away
+            wanted = aliased(models.AuditTech)
+            statement = statement.where(exists().where(wanted.audit_id == matches.c.audit_id, wanted.name_key == tech.lower()))
+        return statement
+
+    if structured or techs:
+        ranked = _matches(dialect, q)
+        page = (
+            filtered(ranked, ranked.c.audit_id, ranked.c.rank)
+            .order_by(desc(ranked.c.rank), desc(ranked.c.audit_id))
+            .limit(limit)
+            .offset(offset)
+            .subquery("page")
+        )
+    else:
+        page = _matches(dialect, q, limit=limit, offset=offset)
+    items = (
+        select(*crud.AUDIT_SUMMARY_COLUMNS, page.c.rank)
+        .join(page, page.c.audit_id == models.Audit.id)
+        .order_by(desc(page.c.rank), desc(models.Audit.id))
+    )
+    matches = _matches(dialect, q, ranked=False)
+    verdict_counts = (
+        filtered(matches, models.Audit.verdict, func.count(), join_audits=True)
+        .group_by(models.Audit.verdict)
+        .order_by(desc(func.count()))
+    )
+    matches = _matches(dialect, q, ranked=False)
+    count = func.count(models.AuditTech.audit_id)
+    tech_counts = (
+        filtered(matches, func.min(models.AuditTech.name), count)
+        .join(models.AuditTech, models.AuditTech.audit_id == matches.c.audit_id)
+        .group_by(models.AuditTech.name_key)
+        .order_by(desc(count))
+        .limit(FACET_LIMIT)
+    )
+    return items, verdict_counts, tech_counts
+
+def search_result(items, verdict_counts, tech_counts) -> dict:
+    return {
+        "total": sum(n for _, n in verdict_counts),
+        "items": items,
+        "facets": {
+            "verdict": [{"value": value, "count": n} for value, n in verdict_counts if value],
+            "tech": [{"value": value, "count": n} for value, n in tech_counts],
+        },
+    }
+
+def search_audits(db: Session, q: str, **options) -> dict:
+    """Full-text search over critique, JD and README, best match first (see search_queries)."""
+    queries = search_queries(_dialect(db.get_bind()), q, **options)
+    if queries is None:
+        return EMPTY_RESULT
+    return search_result(*(db.execute(query).all() for query in queries))
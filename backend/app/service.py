@@ -1,15 +1,27 @@
 import os
-import json
-from typing import Optional
+import re
+import time
+import logging
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional
 from fastapi import HTTPException
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
-def generate_audit_report(metadata: dict, jd: Optional[str]):
-    llm = ChatGoogleGenerativeAI(model="gemini-flash-lite-latest", google_api_key=os.getenv("GEMINI_API_KEY"), temperature=0.7)
-    
-    prompt_template = """
+from . import metrics
+from .llm_output import LLMOutputError, parse_verdict
+from .utils import FILE_MATCHER
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-flash-lite-latest")
+# Token budget for the README summary and how many example paths each category keeps
+README_TOKEN_BUDGET = int(os.getenv("README_TOKEN_BUDGET", "600"))
+REPRESENTATIVE_PATHS = int(os.getenv("REPRESENTATIVE_PATHS", "8"))
+# LLM calls per audit before giving up on unparseable output (reconnaissance is never redone)
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+
+PROMPT_TEMPLATE = """
     You are a Cynical Staff Engineer at a high-growth startup. Your job is to audit a candidate's GitHub repository.
     Be ruthless, efficient, and uncompromising. You see through "Tutorial Hell" projects.
 
@@ -29,6 +41,7 @@ def generate_audit_report(metadata: dict, jd: Optional[str]):
     - ML/Data Science Artifacts: {ml_artifacts}
     - **SOURCE CODE PROOF**: {source_code_files}
     - README Content: {readme_content}
+    - Deep code analysis: {deep_signals}
 
     CRITICAL EVALUATION RULES:
     
@@ -38,6 +51,7 @@ def generate_audit_report(metadata: dict, jd: Optional[str]):
     - database.py or schema.prisma = they're using a real database, not SQLite hello-world.
     - migrations/ folder = production-ready data management.
     - DO NOT critique "lack of code evidence" if source_code_files is populated.
+    - When deep code analysis is present, trust its measured LOC, test ratio, CI jobs and dependency counts over guesses from file names.
     
     **For ML/Data Science Projects:**
     - Jupyter notebooks (.ipynb) are LEGITIMATE tools for exploration and analysis, NOT tutorial markers.
@@ -74,28 +88,185 @@ def generate_audit_report(metadata: dict, jd: Optional[str]):
         "tech_stack_inferred": ["string"]
     }}
     """
-    
+
+# Parsed once at import instead of on every audit
+PROMPT = PromptTemplate(
+    template=PROMPT_TEMPLATE,
+    input_variables=["found_files", "tech_stack", "ml_artifacts", "source_code_files", "readme_content", "deep_signals", "jd_section"]
+)
+
+@lru_cache(maxsize=1)
+def get_llm() -> ChatGoogleGenerativeAI:
+    """One long-lived Gemini client per process (keeps its HTTP connections warm)."""
+    return ChatGoogleGenerativeAI(model=GEMINI_MODEL, google_api_key=os.getenv("GEMINI_API_KEY"), temperature=0.7)
+
+@lru_cache(maxsize=1)
+def get_audit_chain():
+    """prompt | Gemini. Returns the AIMessage so token usage can be recorded."""
+    return PROMPT | get_llm()
+
+# --- Token budgeting ---
+
+def count_tokens(text: str) -> int:
+    """
+    Local token estimate (~4 characters per token for English/code). Avoids a
+    network round trip to the count-tokens API; real usage is taken from the
+    response metadata whenever Gemini reports it.
+    """
+    return (len(text) + 3) // 4
+
+def _representative(paths: List[str], limit: int) -> List[str]:
+    """Shallowest paths first, one per distinct file name, so the examples show breadth."""
+    seen, picked = set(), []
+    for path in sorted(paths, key=lambda p: (p.count("/"), p)):
+        name = path.rsplit("/", 1)[-1]
+        if name not in seen:
+            seen.add(name)
+            picked.append(path)
+        if len(picked) == limit:
+            break
+    return picked
+
+def summarize_paths(paths: List[str], limit: int = REPRESENTATIVE_PATHS) -> str:
+    """'<count> files: a, b, c (+N more)' instead of the full list."""
+    if not paths:
+        return "none"
+    sample = _representative(paths, limit)
+    more = len(paths) - len(sample)
+    suffix = f" (+{more} more)" if more else ""
+    noun = "file" if len(paths) == 1 else "files"
+    return f"{len(paths)} {noun}: {', '.join(sample)}{suffix}"
+
+def summarize_found_files(found_files: List[str]) -> str:
+    """Folds the raw file list into per-category counts with representative paths."""
+    lines = []
+    for category, paths in FILE_MATCHER.classify(found_files).items():
+        if paths:
+            lines.append(f"{category}: {summarize_paths(paths)}")
+    return "; ".join(lines) if lines else "none"
+
+_README_NOISE = [
+    (re.compile(r"<!--.*?-->", re.S), ""),                  # HTML comments
+    (re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)"), ""),    # linked badges
+    (re.compile(r"!\[[^\]]*\]\([^)]*\)"), ""),                # images
+    (re.compile(r"<[^>]+>"), ""),                           # raw HTML tags
+    (re.compile(r"\[([^\]]+)\]\([^)]*\)"), r"\1"),            # [text](url) -> text
+]
+_CODE_BLOCK = re.compile(r"```.*?(?:```|$)", re.S)
+
+def summarize_readme(readme: str, budget: int = README_TOKEN_BUDGET) -> str:
+    """
+    Extractive README summary within a token budget: badges, images, HTML and
+    link targets are dropped, code blocks collapse to a one-line marker, and
+    whole lines are kept in document order until the budget runs out.
+    """
+    if not readme:
+        return ""
+    text = _CODE_BLOCK.sub(lambda m: f"[code block: {m.group(0).count(chr(10)) + 1} lines]", readme)
+    for pattern, replacement in _README_NOISE:
+        text = pattern.sub(replacement, text)
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            kept.append("[README truncated]")
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+def summarize_deep_signals(signals: Optional[dict]) -> str:
+    """One line of measured repo statistics (deep mode), or a marker that none were collected."""
+    if not signals:
+        return "not collected (shallow audit)"
+    languages = list(signals["languages"].items())
+    top = ", ".join(f"{name} {stats['loc']} LOC/{stats['files']} files" for name, stats in languages[:REPRESENTATIVE_PATHS])
+    if len(languages) > REPRESENTATIVE_PATHS:
+        top += f" (+{len(languages) - REPRESENTATIVE_PATHS} more)"
+    dependencies = ", ".join(f"{eco} {n}" for eco, n in signals["dependencies"].items()) or "none"
+    parts = [
+        f"{signals['files']} files, {signals['loc']} non-blank LOC ({top or 'no source'})",
+        f"tests: {signals['test_files']} of {signals['source_files']} source files (ratio {signals['test_ratio']})",
+        f"CI: {signals['ci_jobs']} jobs in {signals['ci_workflows']} workflows",
+        f"dependencies declared: {dependencies} across {signals['manifests']} manifests",
+    ]
+    if signals["truncated"]:
+        parts.append("partial scan (size cap reached)")
+    return "; ".join(parts)
+
+def build_prompt_inputs(metadata: dict, jd: Optional[str]) -> dict:
+    """Maps compacted reconnaissance output + JD onto the prompt variables."""
     jd_section = f"**JOB DESCRIPTION:**\n{jd}" if jd else "NO JOB DESCRIPTION PROVIDED."
+    return {
+        "found_files": summarize_found_files(metadata["found_files"]),
+        "tech_stack": summarize_paths(metadata["tech_stack"]),
+        "ml_artifacts": summarize_paths(metadata.get("ml_artifacts", [])),
+        "source_code_files": summarize_paths(metadata.get("source_code_files", []), limit=REPRESENTATIVE_PATHS * 2),
+        "readme_content": summarize_readme(metadata["readme_content"]),
+        "deep_signals": summarize_deep_signals(metadata.get("deep_signals")),
+        "jd_section": jd_section
+    }
 
-    prompt = PromptTemplate(
-        template=prompt_template,
-        input_variables=["found_files", "tech_stack", "ml_artifacts", "source_code_files", "readme_content", "jd_section"]
-    )
-    
-    chain = prompt | llm | StrOutputParser()
+# --- LLM calls ---
+
+def message_text(message) -> str:
+    """Text of an AIMessage(Chunk); Gemini may return a list of content blocks."""
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+def record_llm_call(inputs: dict, message, seconds: float, mode: str) -> Dict[str, int]:
+    """Records prompt/completion tokens and latency for one call; estimates when Gemini reports no usage."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens") or count_tokens(PROMPT.format(**inputs))
+    completion_tokens = usage.get("output_tokens") or count_tokens(message_text(message))
+    metrics.llm_prompt_tokens.observe(prompt_tokens, mode=mode)
+    metrics.llm_completion_tokens.observe(completion_tokens, mode=mode)
+    metrics.llm_call_seconds.observe(seconds, mode=mode)
+    logger.info("LLM %s call: %d prompt tokens, %d completion tokens, %.2fs", mode, prompt_tokens, completion_tokens, seconds)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+def parse_audit_response(response_str: str) -> dict:
+    """Turns the raw LLM text into a validated verdict dict (raises LLMOutputError)."""
+    return parse_verdict(response_str)
+
+def llm_failure(e: Exception) -> HTTPException:
+    return HTTPException(status_code=500, detail=f"The AI brain glitched. Error: {str(e)}")
+
+def generate_audit_report(metadata: dict, jd: Optional[str], attempts: int = LLM_MAX_ATTEMPTS):
+    """
+    Scores compacted reconnaissance. Only this LLM step is retried when the
+    answer can't be parsed or validated; the inputs are built once and reused.
+    """
+    if attempts < 1:
+        raise ValueError(f"attempts must be at least 1, got {attempts}")
+    inputs = build_prompt_inputs(metadata, jd)
     
-    try:
-        response_str = chain.invoke({
-            "found_files": metadata["found_files"],
-            "tech_stack": metadata["tech_stack"],
-            "ml_artifacts": metadata.get("ml_artifacts", []),
-            "source_code_files": metadata.get("source_code_files", []),
-            "readme_content": metadata["readme_content"],
-            "jd_section": jd_section
-        })
-        
-        clean_json_str = response_str.strip().lstrip("```json").rstrip("```")
-        return json.loads(clean_json_str)
-    except Exception as e:
-        # Fallback error handling if LLM fails or returns bad JSON
-        raise HTTPException(status_code=500, detail=f"The AI brain glitched. Error: {str(e)}")
+    for attempt in range(1, attempts + 1):
+        try:
+            start = time.perf_counter()
+            message = get_audit_chain().invoke(inputs)
+            record_llm_call(inputs, message, time.perf_counter() - start, mode="invoke")
+            return parse_audit_response(message_text(message))
+        except LLMOutputError as e:
+            logger.warning("Unparseable LLM output (attempt %d/%d): %s", attempt, attempts, e)
+            if attempt == attempts:
+                raise llm_failure(e)
+        except Exception as e:
+            # Fallback error handling if the LLM call itself fails
+            raise llm_failure(e)
+
+async def stream_audit_report(metadata: dict, jd: Optional[str]) -> AsyncIterator[str]:
+    """Yields the raw LLM output chunk by chunk; the caller parses the full text at the end."""
+    inputs = build_prompt_inputs(metadata, jd)
+    start = time.perf_counter()
+    full = None
+    async for chunk in get_audit_chain().astream(inputs):
+        full = chunk if full is None else full + chunk
+        yield message_text(chunk)
+    if full is not None:
+        record_llm_call(inputs, full, time.perf_counter() - start, mode="stream")
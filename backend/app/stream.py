@@ -0,0 +1,99 @@
+import json
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException
+
+from . import cache, metrics, schemas
+from .llm_output import JSONObjectExtractor, LLMOutputError
+from .pipeline import get_reconnaissance, save_audit
+from .ratelimit import GitHubRateLimited
+from .service import LLM_MAX_ATTEMPTS, llm_failure, parse_audit_response, stream_audit_report
+from .utils import FILE_MATCHER, require_repo, resolve_head
+
+logger = logging.getLogger(__name__)
+
+# Representative paths sent per category in the "files" events
+SAMPLE_PATHS = 5
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_audit(req: schemas.AuditRequest) -> AsyncIterator[str]:
+    """
+    Runs one audit and reports each phase as a Server-Sent Event:
+      phase   {"phase": "resolve" | "tree" | "readme" | "deep" | "llm", ...} ("llm" repeats on a retry)
+      files   {"category", "count", "paths"}   one per FILES_TO_CHECK category
+      token   {"text"}                         LLM output as it arrives
+      verdict AuditResponse                    always the last event on success
+      error   {"detail", "status"}
+    The audit itself runs in a task feeding a queue, so progress callbacks from
+    deep inside reconnaissance can be forwarded as they happen.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data):
+        queue.put_nowait(format_sse(event, data))
+
+    async def run():
+        repo_url = str(req.repo_url)
+        jd = req.job_description
+        try:
+            owner, repo = require_repo(repo_url)
+            branch, commit_sha = await resolve_head(owner, repo)
+            emit("phase", {"phase": "resolve", "branch": branch, "commit_sha": commit_sha})
+            jd_hash = cache.hash_job_description(jd)
+
+            if not req.force_reaudit:
+                cached = await cache.get_verdict(owner, repo, commit_sha, jd_hash, bool(req.deep))
+                if cached:
+                    emit("verdict", {**cached.model_dump(mode="json"), "cached": True})
+                    return
+
+            metadata = await get_reconnaissance(
+                repo_url, owner, repo, commit_sha,
+                progress=lambda phase, data: emit("phase", {"phase": phase, **data}),
+                deep=bool(req.deep),
+            )
+            for category, paths in FILE_MATCHER.classify(metadata["found_files"]).items():
+                emit("files", {"category": category, "count": len(paths), "paths": paths[:SAMPLE_PATHS]})
+
+            # Only the LLM step is retried on unparseable output; recon above is reused
+            for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+                emit("phase", {"phase": "llm", "attempt": attempt})
+                # The verdict object is located while tokens arrive; trailing prose is ignored
+                extractor = JSONObjectExtractor()
+                with metrics.span("llm"):
+                    async for chunk in stream_audit_report(metadata, jd):
+                        extractor.feed(chunk)
+                        emit("token", {"text": chunk})
+                try:
+                    llm_result = parse_audit_response(extractor.result or "")
+                    break
+                except LLMOutputError as e:
+                    if attempt == LLM_MAX_ATTEMPTS:
+                        raise llm_failure(e)
+
+            audit = await save_audit(repo_url, jd, metadata, llm_result, owner, repo, commit_sha, jd_hash, "deep_signals" in metadata)
+            emit("verdict", audit.model_dump(mode="json"))
+        except HTTPException as e:
+            emit("error", {"detail": str(e.detail), "status": e.status_code})
+        except GitHubRateLimited as e:
+            emit("error", {"detail": str(e), "status": 429, "retry_after": e.retry_after})
+        except Exception:
+            logger.exception("Streaming audit of %s crashed", repo_url)
+            emit("error", {"detail": "Internal error while auditing.", "status": 500})
+        finally:
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            message: Optional[str] = await queue.get()
+            if message is None:
+                break
+            yield message
+    finally:
+        # Client went away mid-stream: stop the audit too
+        if not task.done():
+            task.cancel()
@@ -1,8 +1,13 @@
-import os
-import requests
+import asyncio
+import httpx
+from typing import Callable, Optional
 from urllib.parse import urlparse
 from fastapi import HTTPException
 
+from . import metrics
+from .github import GITHUB_API_URL, GITHUB_RAW_URL, get_client
+from .patterns import PatternMatcher
+
 # Expanded file patterns with common variants
 FILES_TO_CHECK = {
     "readme": ["README.md", "readme.md", "README.markdown", "README.rst", "README.txt"],
@@ -11,6 +16,7 @@ FILES_TO_CHECK = {
         "docker-compose.yml", "docker-compose.yaml", "compose.yml", "compose.yaml",
         ".github/workflows/main.yml", ".github/workflows/ci.yml", ".github/workflows/build.yml",
         ".github/workflows/test.yml", ".github/workflows/deploy.yml",
+        ".github/workflows/*.yml", ".github/workflows/*.yaml",
         "Makefile", "makefile",
         ".gitlab-ci.yml", "Jenkinsfile", "azure-pipelines.yml",
         "vercel.json", "netlify.toml", "render.yaml"
@@ -64,124 +70,164 @@ FILES_TO_CHECK = {
     ]
 }
 
-def get_github_headers():
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    token = os.getenv("GITHUB_TOKEN")
-    if token:
-        headers["Authorization"] = f"token {token}"
-    return headers
+# Compiled once at import; classification is a single pass over the tree listing
+FILE_MATCHER = PatternMatcher(FILES_TO_CHECK)
 
-def get_github_raw_url(repo_url: str, file_path: str, branch: str = "main"):
-    """Converts a GitHub repo URL into a raw content URL."""
+def parse_repo_url(repo_url: str):
+    """Extracts (owner, repo) from a GitHub repo URL. Returns None if the URL has no repo path."""
     parsed = urlparse(repo_url)
     path_parts = parsed.path.strip("/").split("/")
     if len(path_parts) < 2:
         return None
     owner, repo = path_parts[0], path_parts[1]
-    return f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file_path}"
+    if repo.endswith(".git"):
+        repo = repo[:-4]
+    return owner, repo
+
+def get_github_raw_url(repo_url: str, file_path: str, branch: str = "main"):
+    """Converts a GitHub repo URL into a raw content URL."""
+    parts = parse_repo_url(repo_url)
+    if not parts:
+        return None
+    owner, repo = parts
+    return f"{GITHUB_RAW_URL}/{owner}/{repo}/{branch}/{file_path}"
+
+def _raise_for_github_status(res, owner: str, repo: str):
+    """Maps a failed GitHub API response onto the HTTP error the client should see."""
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail="Repository not found or lacks a README. Spartans don't audit ghosts.")
+    raise HTTPException(status_code=502, detail=f"GitHub API error for {owner}/{repo}: HTTP {res.status_code}")
+
+async def _api_get(owner: str, repo: str, url: str, **kwargs):
+    """GET against the GitHub API; network failures surface as 502 instead of a stack trace."""
+    try:
+        res = await get_client().get(url, **kwargs)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"GitHub unreachable for {owner}/{repo}: {e.__class__.__name__}")
+    if res.status_code != 200:
+        _raise_for_github_status(res, owner, repo)
+    return res
 
-def get_all_directories_recursive(repo_url: str, path: str = "", depth: int = 0, max_depth: int = 2, max_total_dirs: int = 15):
+async def get_default_branch(owner: str, repo: str) -> str:
+    """Asks the GitHub API for the repository's default branch (one call, no guessing main/master)."""
+    res = await _api_get(owner, repo, f"{GITHUB_API_URL}/repos/{owner}/{repo}")
+    return res.json().get("default_branch") or "main"
+
+async def get_head_commit(owner: str, repo: str, branch: str) -> str:
     """
-    Recursively fetches ALL directories in a repository up to max_depth.
-    Returns a list of directory paths (e.g., ['', 'backend/', 'backend/app/', 'frontend/src/']).
-    LIMITED to prevent timeouts on large repos.
+    Resolves the branch HEAD to a commit SHA. The sha media type returns just the
+    40-char SHA, and with the ETag cache an unchanged repo costs a free 304.
     """
-    if depth > max_depth:
-        return []
-    
-    parsed = urlparse(repo_url)
-    path_parts = parsed.path.strip("/").split("/")
-    if len(path_parts) < 2:
-        return []
-    owner, repo = path_parts[0], path_parts[1]
-    
-    dirs = [path] if path else [""]  # Include current path
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-    
+    res = await _api_get(
+        owner, repo, f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{branch}",
+        headers={"Accept": "application/vnd.github.sha"},
+    )
+    return res.text.strip()
+
+async def resolve_head(owner: str, repo: str):
+    """Returns (default_branch, head_sha) - the cheap first step of every audit."""
+    with metrics.span("resolve"):
+        branch = await get_default_branch(owner, repo)
+        return branch, await get_head_commit(owner, repo, branch)
+
+async def get_repo_tree(owner: str, repo: str, ref: str):
+    """
+    Pulls the full file listing of a repository in ONE call via the recursive Git Trees API.
+    Returns (paths, truncated). GitHub truncates very large trees (100k+ entries); the
+    partial listing is still used since it covers the shallowest directories first.
+    """
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{ref}"
+    res = await _api_get(owner, repo, api_url, params={"recursive": "1"})
+    payload = res.json()
+    paths = [item["path"] for item in payload.get("tree", []) if item.get("type") == "blob"]
+    return paths, bool(payload.get("truncated"))
+
+def classify_files(paths):
+    """Buckets a repository file listing into FILES_TO_CHECK categories locally (no network)."""
+    return FILE_MATCHER.classify(paths)
+
+def pick_readme(readme_paths):
+    """Prefers the root README, otherwise the shallowest one found."""
+    if not readme_paths:
+        return None
+    return min(readme_paths, key=lambda p: (p.count("/"), p))
+
+async def fetch_readme(owner: str, repo: str, ref: str, path: str) -> str:
+    """Downloads the README body (first 5000 chars) from the raw content host."""
     try:
-        res = requests.get(api_url, headers=get_github_headers(), timeout=2)  # Strict 2-second timeout
+        res = await get_client().get(f"{GITHUB_RAW_URL}/{owner}/{repo}/{ref}/{path}")
         if res.status_code == 200:
-            contents = res.json()
-            for item in contents:
-                if item.get("type") == "dir":
-                    # Stop if we've already found too many directories
-                    if len(dirs) >= max_total_dirs:
-                        return dirs
-                    
-                    subdir_path = f"{item['path']}/"
-                    dirs.append(subdir_path)
-                    # Recursively get nested directories
-                    nested = get_all_directories_recursive(repo_url, item['path'], depth + 1, max_depth, max_total_dirs)
-                    dirs.extend(nested)
-                    
-                    # Check again after recursion
-                    if len(dirs) >= max_total_dirs:
-                        return dirs
-    except:
+            return res.text[:5000]
+    except httpx.HTTPError:
         pass
-    
-    return list(set(dirs))  # Remove duplicates
+    return ""
 
-def fetch_repo_metadata(repo_url: str):
+async def fetch_root_readme(owner: str, repo: str, ref: str) -> str:
+    """Fetches the root README through the API (no path guessing), so it can run alongside the tree listing."""
+    try:
+        res = await get_client().get(
+            f"{GITHUB_API_URL}/repos/{owner}/{repo}/readme",
+            params={"ref": ref},
+            headers={"Accept": "application/vnd.github.raw"},
+        )
+        if res.status_code == 200:
+            return res.text[:5000]
+    except httpx.HTTPError:
+        pass
+    return ""
+
+def require_repo(repo_url: str):
+    """parse_repo_url, but an unusable URL is a 400."""
+    parts = parse_repo_url(repo_url)
+    if not parts:
+        raise HTTPException(status_code=400, detail="Invalid GitHub repository URL.")
+    return parts
+
+def count_directories(paths) -> int:
+    """Distinct directories (root included) covered by a file listing."""
+    return len({path.rsplit("/", 1)[0] for path in paths if "/" in path}) + 1
+
+async def fetch_repo_metadata(repo_url: str, commit_sha: Optional[str] = None,
+                              progress: Optional[Callable[[str, dict], None]] = None):
     """
     Checks for key 'Proof of Engineering' files without cloning.
-    Recursively scans ALL subdirectories up to 2 levels deep.
-    Supports variant filenames (e.g., requirements_ml.txt, requirements_backend.txt).
+    Pulls the whole tree of the default branch in one listing, matches every
+    FILES_TO_CHECK category locally and only downloads the README body.
+    Everything is read at a fixed commit, so the result can be cached by SHA.
+    `progress(phase, data)` is called as each phase completes (used for streaming).
     """
-    
-    # Recursively fetch ALL subdirectories (up to 3 levels deep)
-    all_dirs = get_all_directories_recursive(repo_url)
-    
-    found_files = []
-    readme_content = ""
-    tech_stack = []
-    ml_artifacts = []  # Track ML/DS specific files
-    source_code_files = []  # Track actual source code
-    
-    # Try 'main' then 'master' branches
-    for branch in ["main", "master"]:
-        current_found = []
-        for dir_path in all_dirs:
-            for category, filenames in FILES_TO_CHECK.items():
-                for filename in filenames:
-                    # Skip .github paths if we're not at root (they're always at root)
-                    if filename.startswith(".github") and dir_path:
-                        continue
-                    
-                    full_path = f"{dir_path}{filename}"
-                    raw_url = get_github_raw_url(repo_url, full_path, branch)
-                    if not raw_url: continue
-                    
-                    try:
-                        res = requests.get(raw_url, headers=get_github_headers(), timeout=2)
-                        if res.status_code == 200:
-                            current_found.append(full_path)
-                            # Prefer root README, but take subdir if not found
-                            if category == "readme" and not readme_content:
-                                readme_content = res.text[:5000]
-                            if category == "stack":
-                                tech_stack.append(full_path)
-                            if category == "ml_artifacts":
-                                ml_artifacts.append(full_path)
-                            if category == "source_code":
-                                source_code_files.append(full_path)
-                    except:
-                        pass
-        
-        if current_found:
-            found_files = list(set(current_found))
-            break
-            
+    owner, repo = require_repo(repo_url)
+
+    if not commit_sha:
+        _branch, commit_sha = await resolve_head(owner, repo)
+    # Tree listing and root README are independent: fetch them concurrently
+    with metrics.span("recon.listing"):
+        (paths, truncated), readme_content = await asyncio.gather(
+            get_repo_tree(owner, repo, commit_sha),
+            fetch_root_readme(owner, repo, commit_sha),
+        )
+    with metrics.span("recon.classify"):
+        matches = classify_files(paths)
+    if progress:
+        progress("tree", {"files": len(paths), "directories": count_directories(paths), "truncated": truncated})
+
+    found_files = sorted({path for category_paths in matches.values() for path in category_paths})
+    # No root README: fall back to the shallowest one in the tree
+    readme_path = pick_readme(matches["readme"])
+    if not readme_content and readme_path:
+        with metrics.span("recon.readme"):
+            readme_content = await fetch_readme(owner, repo, commit_sha, readme_path)
+    if progress:
+        progress("readme", {"path": readme_path, "chars": len(readme_content)})
+
     if not readme_content and not found_files:
         raise HTTPException(status_code=404, detail="Repository not found or lacks a README. Spartans don't audit ghosts.")
-        
+
     return {
         "found_files": found_files,
         "readme_content": readme_content,
-        "tech_stack": tech_stack,
-        "ml_artifacts": ml_artifacts,
-        "source_code_files": source_code_files
+        "tech_stack": matches["stack"],
+        "ml_artifacts": matches["ml_artifacts"],
+        "source_code_files": matches["source_code"],
+        "commit_sha": commit_sha
     }
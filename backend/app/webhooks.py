@@ -0,0 +1,161 @@
+import os
+import hmac
+import json
+import hashlib
+from typing import Dict, Optional, Set, Tuple
+from fastapi import HTTPException
+
+from . import cache, crud, crud_async, metrics, schemas
+from .database import AsyncSessionLocal
+from .jobs import job_queue
+from .pipeline import get_reconnaissance
+from .utils import FILE_MATCHER, fetch_readme, fetch_root_readme, pick_readme
+
+# Shared secret configured on the GitHub webhook (X-Hub-Signature-256)
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+
+# GitHub lists at most this many commits per push; longer pushes are re-crawled instead
+PUSH_COMMIT_LIMIT = 2048
+ZERO_SHA = "0" * 40
+
+# FILES_TO_CHECK categories kept as their own list in the recon payload
+CATEGORY_FIELDS = {"stack": "tech_stack", "ml_artifacts": "ml_artifacts", "source_code": "source_code_files"}
+
+def verify_signature(body: bytes, signature: Optional[str]):
+    """Rejects deliveries not signed with GITHUB_WEBHOOK_SECRET."""
+    if not GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="GITHUB_WEBHOOK_SECRET is not configured.")
+    expected = "sha256=" + hmac.new(GITHUB_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    if not signature or not hmac.compare_digest(expected, signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature.")
+
+def net_changes(commits) -> Dict[str, bool]:
+    """path -> whether it still exists after the push, applying the commits in order."""
+    changes = {}
+    for commit in commits:
+        for path in commit.get("added", []) + commit.get("modified", []):
+            changes[path] = True
+        for path in commit.get("removed", []):
+            changes[path] = False
+    return changes
+
+def apply_changes(base: dict, changes: Dict[str, bool], commit_sha: str) -> Tuple[dict, Set[str]]:
+    """
+    Recon payload at commit_sha from the payload at the push's parent plus the changed paths.
+    Only paths matching a FILES_TO_CHECK category can alter it. Returns (payload, categories touched).
+    """
+    found = set(base["found_files"])
+    lists = {field: list(base.get(field, [])) for field in CATEGORY_FIELDS.values()}
+    touched = set()
+    for path, present in changes.items():
+        categories = FILE_MATCHER.match(path)
+        touched |= categories
+        if not categories:
+            continue
+        if present:
+            found.add(path)
+        else:
+            found.discard(path)
+        for category in categories & CATEGORY_FIELDS.keys():
+            paths = lists[CATEGORY_FIELDS[category]]
+            if present and path not in paths:
+                paths.append(path)
+            elif not present and path in paths:
+                paths.remove(path)
+    # Deep signals describe every file, so they're recomputed on the next deep audit rather than patched
+    payload = {key: value for key, value in base.items() if key != "deep_signals"}
+    return {**payload, **lists, "found_files": sorted(found), "commit_sha": commit_sha}, touched
+
+async def refresh_readme(owner: str, repo: str, commit_sha: str, found_files) -> str:
+    """README body at a commit, picked the same way as fetch_repo_metadata (root first)."""
+    readme = await fetch_root_readme(owner, repo, commit_sha)
+    if not readme:
+        path = pick_readme([p for p in found_files if "readme" in FILE_MATCHER.match(p)])
+        if path:
+            readme = await fetch_readme(owner, repo, commit_sha, path)
+    return readme
+
+def _result(status: str, **fields) -> schemas.WebhookResult:
+    metrics.webhook_pushes.inc(outcome=status)
+    return schemas.WebhookResult(status=status, **fields)
+
+async def handle_delivery(event: str, body: bytes) -> schemas.WebhookResult:
+    """Routes a verified delivery; anything but a push is acknowledged and ignored."""
+    if event != "push":
+        return _result("ignored")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body is not valid JSON.")
+    return await handle_push(payload)
+
+async def handle_push(payload: dict) -> schemas.WebhookResult:
+    """
+    Keeps audited repos fresh from push events instead of full re-audits.
+    The stored recon of the parent commit is patched with the pushed paths (no tree
+    crawl; the README is re-fetched only if a README path changed). If neither the
+    artifact set nor the README changed, the existing verdicts are carried onto the new
+    commit (deep ones only if no file changed at all); every other verdict gets one
+    re-score job, which reuses the patched recon, so the only cost is the LLM call.
+    """
+    repository = payload.get("repository") or {}
+    owner, _, repo = (repository.get("full_name") or "").partition("/")
+    before, after = payload.get("before"), payload.get("after")
+    if not owner or not repo or not before or not after:
+        raise HTTPException(status_code=400, detail="Not a GitHub push payload.")
+
+    # Only the default branch is audited; branch deletions leave nothing to audit
+    branch = repository.get("default_branch") or repository.get("master_branch")
+    if payload.get("deleted") or after == ZERO_SHA or payload.get("ref") != f"refs/heads/{branch}":
+        return _result("ignored", commit_sha=after)
+
+    cache.put_head(owner, repo, branch, after)
+    async with AsyncSessionLocal() as db:
+        audits = await crud_async.get_audits_at_commit(db, *cache.repo_key(owner, repo), before)
+    if not audits:
+        return _result("untracked", commit_sha=after)
+    repo_url = audits[0].repo_url
+
+    commits = payload.get("commits") or []
+    base = None
+    if not payload.get("forced") and len(commits) < PUSH_COMMIT_LIMIT:
+        base = await cache.get_recon(owner, repo, before)
+    if base is None:
+        # History rewritten or parent recon unknown: one full crawl, still no LLM call unless something changed
+        recon, touched = await get_reconnaissance(repo_url, owner, repo, after), set()
+    else:
+        changes = net_changes(commits)
+        recon, touched = apply_changes(base, changes, after)
+        if "readme" in touched:
+            recon["readme_content"] = await refresh_readme(owner, repo, after, recon["found_files"])
+        await cache.put_recon(owner, repo, after, recon)
+
+    readme = recon["readme_content"]
+    artifacts_changed = set(recon["found_files"]) != set(audits[0].found_files)
+    readme_changed = (crud.hash_readme(readme) if readme else None) != audits[0].readme_hash
+    fields = dict(
+        commit_sha=after, categories=sorted(touched),
+        artifacts_changed=artifacts_changed, readme_changed=readme_changed,
+    )
+
+    carried, stale = [], audits
+    if not artifacts_changed and not readme_changed:
+        # Deep verdicts rest on LOC / test / CI counts over every file, so any changed path voids them
+        files_changed = base is None or bool(changes)
+        carried = [audit for audit in audits if not (audit.deep and files_changed)]
+        stale = [audit for audit in audits if audit.deep and files_changed]
+        async with AsyncSessionLocal() as db:
+            # A redelivered push finds its verdicts already carried
+            present = {audit.id for audit in await crud_async.get_audits_at_commit(db, *cache.repo_key(owner, repo), after)}
+            await crud_async.carry_audits(db, [audit for audit in carried if audit.id not in present], after)
+        for audit in carried:
+            await cache.put_verdict(schemas.AuditResponse.model_validate(audit), owner, repo, after, audit.jd_hash, bool(audit.deep))
+
+    jobs = [
+        await job_queue.submit(schemas.AuditRequest(repo_url=repo_url, job_description=audit.job_description, deep=bool(audit.deep)))
+        for audit in stale
+    ]
+    return _result(
+        "rescored" if jobs else "carried",
+        carried_audit_ids=[audit.id for audit in carried], job_ids=[job.id for job in jobs], **fields,
+    )
@@ -0,0 +1,2 @@
+# Offline benchmarks for the audit pipeline.
+# Run from the backend directory, e.g. `python -m benchmarks.bench_recon`.
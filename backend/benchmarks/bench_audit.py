@@ -0,0 +1,107 @@
+"""
+End-to-end audit latency, GitHub calls and memory per audit, fully offline.
+The stub GitHub server serves the fixture repos (benchmarks/fixture_repos.py:
+tiny, ml-heavy, 10k-file monorepo) and a fake LLM answers after --llm-latency
+seconds. Every audit runs the real pipeline (resolve -> recon -> prompt -> LLM
+-> DB) against a fresh HEAD SHA, so nothing is served from cache. --deep also
+streams each repo's tarball through deep reconnaissance.
+
+    python -m benchmarks.bench_audit --audits 20 --llm-latency 0.5
+    python -m benchmarks.bench_audit --repos monorepo --latency 0.02
+    python -m benchmarks.bench_audit --deep
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+from . import fixture_repos
+from .fake_llm import FakeLLM, install
+from .stub_github import StubGitHub
+
+JD = "Backend engineer, Python and Postgres."
+PHASES = ("recon", "llm", "db_commit")
+
+def _phase_totals(metrics):
+    return {phase: (metrics.phase_seconds.total(phase=phase, status="ok"), metrics.phase_seconds.count(phase=phase, status="ok"))
+            for phase in PHASES}
+
+async def bench_repo(stub: StubGitHub, fixture, n_audits: int, deep: bool = False):
+    from app import metrics, pipeline
+
+    repo_url = f"https://github.com/bench/{fixture.name}"
+    stub.serve(fixture)
+    samples = []
+    requests_before, phases_before = stub.requests, _phase_totals(metrics)
+    for _ in range(n_audits):
+        stub.revision += 1 # New HEAD: recon and verdict caches miss
+        start = time.perf_counter()
+        await pipeline.run_audit_pipeline(repo_url, JD, deep=deep)
+        samples.append(time.perf_counter() - start)
+    http_calls = (stub.requests - requests_before) / n_audits
+    phases_after = _phase_totals(metrics)
+    phase_ms = {
+        phase: (phases_after[phase][0] - phases_before[phase][0]) / max(1, phases_after[phase][1] - phases_before[phase][1]) * 1000
+        for phase in PHASES
+    }
+
+    # Memory in a separate traced audit: tracemalloc would skew the timings above
+    stub.revision += 1
+    tracemalloc.start()
+    await pipeline.run_audit_pipeline(repo_url, JD, deep=deep)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples), p95, http_calls, peak, phase_ms
+
+def main():
+    fixtures = {f.name: f for f in fixture_repos.all_fixtures()}
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audits", type=int, default=10, help="audits per repo")
+    parser.add_argument("--repos", nargs="+", choices=sorted(fixtures), default=list(fixtures))
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated seconds per GitHub request")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="simulated seconds per LLM call")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--deep", action="store_true", help="deep reconnaissance (streamed repo archive)")
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        args.database_url = f"sqlite:///{scratch.name}"
+
+    with StubGitHub([], latency=args.latency) as stub:
+        os.environ.update({"DATABASE_URL": args.database_url, "GITHUB_API_URL": stub.url, "GITHUB_RAW_URL": stub.url})
+        from app import github, init_db
+        from app.database import async_engine
+
+        init_db.main()
+        llm = install(FakeLLM(latency=args.llm_latency))
+
+        async def run():
+            try:
+                return [(name, await bench_repo(stub, fixtures[name], args.audits, args.deep)) for name in args.repos]
+            finally:
+                await github.close_client()
+                await async_engine.dispose()
+
+        try:
+            rows = asyncio.run(run())
+        finally:
+            if scratch:
+                os.remove(scratch.name)
+
+    print(f"{args.audits} {'deep ' if args.deep else ''}audits per repo, GitHub latency {args.latency * 1000:.0f}ms, LLM latency {args.llm_latency * 1000:.0f}ms ({llm.calls} LLM calls)")
+    print(f"{'repo':<10}{'files':>7}{'p50':>10}{'p95':>10}{'http/audit':>12}{'peak mem':>11}"
+          + "".join(f"{phase:>11}" for phase in PHASES))
+    for name, (p50, p95, http_calls, peak, phase_ms) in rows:
+        print(f"{name:<10}{len(fixtures[name].files):>7}{p50 * 1000:>8.1f}ms{p95 * 1000:>8.1f}ms{http_calls:>12.1f}"
+              f"{peak / 2**20:>8.1f}MiB" + "".join(f"{phase_ms[phase]:>9.1f}ms" for phase in PHASES))
+
+if __name__ == "__main__":
+    main()
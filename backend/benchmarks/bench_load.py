@@ -0,0 +1,157 @@
+"""
+Requests/sec at high concurrency against a real uvicorn process:
+  audit-cached  POST /audit/ for repos whose HEAD already has a verdict
+  history       GET /history/?limit=50
+  audit-detail  GET /audit/{id}
+
+GitHub is the local stub (benchmarks/stub_github.py), the database a scratch
+SQLite file seeded with --audits rows unless --database-url is given.
+With --workers N the server is the production gunicorn setup (gunicorn.conf.py)
+with N workers sharing one cache file.
+
+    python -m benchmarks.bench_load --concurrency 64 --duration 10
+    python -m benchmarks.bench_load --workers 4
+"""
+import os
+import sys
+import time
+import socket
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import statistics
+import httpx
+
+from .stub_github import StubGitHub, synthetic_repo
+
+JD = "Backend engineer, Python and Postgres."
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def seed(n_audits: int, commit_sha: str):
+    """Cached verdicts for repos bench/repo0..N at the stub's HEAD."""
+    from app import cache, crud, migrations, schemas
+    from app.database import SessionLocal, engine
+
+    migrations.run(engine)
+    db = SessionLocal()
+    try:
+        for i in range(n_audits):
+            crud.create_audit(db, schemas.AuditCreate(
+                repo_url=f"https://github.com/bench/repo{i}",
+                job_description=JD,
+                engineering_score=random.uniform(0, 10),
+                match_score=random.uniform(0, 100),
+                critique="Seeded verdict for load testing.",
+                verdict="HIRE THIS SPARTAN",
+                found_files=["Dockerfile", "requirements.txt", "app/main.py"],
+                readme_content="# Seeded\n",
+                tech_stack=["Python", "Docker"],
+                repo_owner="bench",
+                repo_name=f"repo{i}",
+                commit_sha=commit_sha,
+                jd_hash=cache.hash_job_description(JD),
+            ))
+    finally:
+        db.close()
+        engine.dispose()
+
+async def _wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/docs")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def run_scenario(base_url: str, make_request, concurrency: int, duration: float):
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.monotonic() + duration
+
+        async def user():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                res = await make_request(client)
+                latencies.append(time.perf_counter() - start)
+                if res.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return len(latencies) / elapsed, statistics.median(latencies), p95, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audits", type=int, default=500, help="seeded audits (cached repos)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--database-url", help="scratch database to seed (default: temporary SQLite file)")
+    parser.add_argument("--workers", type=int, default=0, help="gunicorn workers (default: a single uvicorn process)")
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        args.database_url = f"sqlite:///{scratch.name}"
+    shared_cache = tempfile.NamedTemporaryFile(suffix=".cache.db", delete=False) if args.workers else None
+
+    with StubGitHub(synthetic_repo(), latency=0) as stub:
+        env = {
+            **os.environ,
+            "DATABASE_URL": args.database_url,
+            "GITHUB_API_URL": stub.url,
+            "GITHUB_RAW_URL": stub.url,
+        }
+        if shared_cache:
+            env["SHARED_CACHE_URL"] = f"sqlite:///{shared_cache.name}"
+        os.environ.update(env)
+        seed(args.audits, stub.sha)
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        if args.workers:
+            command = ["-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app", "--workers", str(args.workers),
+                       "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "--access-logfile", "/dev/null"]
+        else:
+            command = ["-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning", "--no-access-log"]
+        server = subprocess.Popen([sys.executable, *command], env=env)
+        try:
+            asyncio.run(_wait_ready(base_url))
+            scenarios = [
+                ("audit-cached", lambda c: c.post("/audit/", json={
+                    "repo_url": f"https://github.com/bench/repo{random.randrange(args.audits)}", "job_description": JD,
+                })),
+                ("history", lambda c: c.get("/history/", params={"limit": 50})),
+                ("audit-detail", lambda c: c.get(f"/audit/{random.randrange(1, args.audits + 1)}")),
+            ]
+            print(f"{args.workers or 1} worker(s), concurrency {args.concurrency}, {args.duration:.0f}s per scenario")
+            print(f"{'scenario':<16}{'req/s':>9}{'p50':>10}{'p95':>10}{'errors':>8}")
+            for name, make_request in scenarios:
+                rps, p50, p95, errors = asyncio.run(run_scenario(base_url, make_request, args.concurrency, args.duration))
+                print(f"{name:<16}{rps:>9.0f}{p50 * 1000:>8.1f}ms{p95 * 1000:>8.1f}ms{errors:>8}")
+        finally:
+            server.terminate()
+            server.wait()
+            if scratch:
+                os.remove(scratch.name)
+            if shared_cache:
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(shared_cache.name + suffix):
+                        os.remove(shared_cache.name + suffix)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Prompt size per audit: the original inputs (raw found_files list + 5,000 chars
+of README) vs the compacted inputs (per-category counts, representative paths,
+README summary). Token counts use service.count_tokens.
+
+    python -m benchmarks.bench_prompt
+"""
+from app import service
+from app.utils import classify_files
+
+README = (
+    "# Project\n"
+    + "[![build](https://img.shields.io/badge/build-passing-green.svg)](https://ci.example.com)\n" * 6
+    + "<p align='center'><img src='docs/logo.png' width='200'/></p>\n\n"
+    + "A service that does things. See the [docs](https://example.com/docs) for details.\n\n"
+    + "## Install\n```bash\n" + "pip install -r requirements.txt\n" * 20 + "```\n"
+    + "## Usage\n" + "Run the server and open the dashboard to explore the results in detail.\n" * 60
+)[:5000]
+
+def synthetic_metadata(n_services: int, n_notebooks: int) -> dict:
+    paths = ["README.md", "Dockerfile", "docker-compose.yml", ".github/workflows/ci.yml"]
+    for i in range(n_services):
+        paths += [f"services/svc{i}/main.py", f"services/svc{i}/models.py", f"services/svc{i}/requirements.txt"]
+    paths += [f"research/exp{i}/analysis.ipynb" for i in range(n_notebooks)]
+    matches = classify_files(paths)
+    return {
+        "found_files": sorted({p for ps in matches.values() for p in ps}),
+        "readme_content": README,
+        "tech_stack": matches["stack"],
+        "ml_artifacts": matches["ml_artifacts"],
+        "source_code_files": matches["source_code"],
+    }
+
+def original_inputs(metadata: dict, jd) -> dict:
+    jd_section = f"**JOB DESCRIPTION:**\n{jd}" if jd else "NO JOB DESCRIPTION PROVIDED."
+    return {
+        "found_files": metadata["found_files"],
+        "tech_stack": metadata["tech_stack"],
+        "ml_artifacts": metadata.get("ml_artifacts", []),
+        "source_code_files": metadata.get("source_code_files", []),
+        "readme_content": metadata["readme_content"],
+        "deep_signals": service.summarize_deep_signals(None),
+        "jd_section": jd_section,
+    }
+
+def main():
+    print(f"{'repo':<22}{'original':>10}{'compacted':>11}{'saved':>8}")
+    for name, services, notebooks in [("tiny", 1, 0), ("full-stack (20 svc)", 20, 5), ("monorepo (500 svc)", 500, 200)]:
+        metadata = synthetic_metadata(services, notebooks)
+        before = service.count_tokens(service.PROMPT.format(**original_inputs(metadata, None)))
+        after = service.count_tokens(service.PROMPT.format(**service.build_prompt_inputs(metadata, None)))
+        print(f"{name:<22}{before:>10}{after:>11}{1 - after / before:>8.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+JD pre-ranking with local vectors (app/embeddings.py): cost of embedding a repo,
+latency of re-ranking the whole archive for a new JD, and whether the right
+repos come first. Synthetic repos each have one primary stack; a JD naming that
+stack should rank those repos on top (precision@10).
+
+    python -m benchmarks.bench_rank --audits 100000
+"""
+import time
+import random
+import argparse
+import statistics
+
+STACKS = {
+    "go-kafka": (["Go", "Kafka", "PostgreSQL"], "event streaming service consumers producers grpc"),
+    "react-web": (["React", "TypeScript", "Next.js"], "storefront components hooks tailwind frontend"),
+    "pytorch-ml": (["Python", "PyTorch", "ONNX"], "training notebooks model inference dataset"),
+    "django-api": (["Python", "Django", "Celery"], "rest api workers admin migrations"),
+    "rust-cli": (["Rust", "Tokio"], "command line async runtime parser"),
+    "spring-java": (["Java", "Spring Boot", "Maven"], "microservice controllers jpa repositories"),
+}
+FILLER = ("project setup install run docs license contributing build test deploy configuration usage "
+          "example features roadmap screenshot environment variables docker compose readme").split()
+JDS = {
+    "go-kafka": "Backend engineer: Golang services, Kafka event streaming, Postgres.",
+    "react-web": "Frontend developer with React, TypeScript and Next.js.",
+    "pytorch-ml": "ML engineer: PyTorch model training and ONNX inference.",
+    "rust-cli": "Systems engineer writing async Rust with Tokio.",
+}
+
+def synthetic_repo(rng: random.Random, stack: str):
+    tech, topic = STACKS[stack]
+    words = rng.choices(FILLER, k=rng.randint(40, 400)) + rng.choices(topic.split(), k=rng.randint(5, 30))
+    rng.shuffle(words)
+    return f"# {stack}\n" + " ".join(words), tech
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audits", type=int, default=100000, help="archive size")
+    parser.add_argument("--queries", type=int, default=50, help="JD re-ranks to time")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from app import embeddings
+
+    rng = random.Random(args.seed)
+    stacks = [rng.choice(sorted(STACKS)) for _ in range(args.audits)]
+    start = time.perf_counter()
+    rows = [(audit_id, embeddings.encode(embeddings.embed_repo(*synthetic_repo(rng, stack))))
+            for audit_id, stack in enumerate(stacks, start=1)]
+    embed_ms = (time.perf_counter() - start) / args.audits * 1000
+
+    index = embeddings.VectorIndex()
+    start = time.perf_counter()
+    index.add(rows)
+    load_s = time.perf_counter() - start
+
+    # First query after new rows also computes IDF and row norms
+    start = time.perf_counter()
+    index.rank(embeddings.embed_text(JDS["go-kafka"]), 10)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    samples, precision = [], {}
+    for i in range(args.queries):
+        stack = sorted(JDS)[i % len(JDS)]
+        start = time.perf_counter()
+        top = index.rank(embeddings.embed_text(JDS[stack]), 10)
+        samples.append(time.perf_counter() - start)
+        precision[stack] = sum(stacks[audit_id - 1] == stack for audit_id, _ in top) / len(top)
+
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{args.audits} audits, {embeddings.EMBEDDING_DIM} dims, {args.audits * embeddings.EMBEDDING_DIM * 4 / 2**20:.0f}MiB matrix")
+    print(f"embed per repo   {embed_ms:8.3f}ms")
+    print(f"index load       {load_s * 1000:8.1f}ms")
+    print(f"first re-rank    {first_ms:8.1f}ms  (IDF + row norms)")
+    print(f"re-rank p50      {statistics.median(samples) * 1000:8.1f}ms")
+    print(f"re-rank p95      {p95 * 1000:8.1f}ms")
+    print("precision@10     " + ", ".join(f"{stack} {p:.1f}" for stack, p in sorted(precision.items())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Wall time per audit: the original sequential per-file probe crawl vs the
+async Trees-API reconnaissance, both against a local stub GitHub server.
+
+    python -m benchmarks.bench_recon --dirs 12 --latency 0.002 --repeat 3
+"""
+import os
+import time
+import asyncio
+import argparse
+import importlib
+import statistics
+import requests
+
+from .stub_github import StubGitHub, synthetic_repo
+
+REPO_URL = "https://github.com/bench/repo"
+
+# --- Legacy path (sequential requests.get per directory x pattern x branch) ---
+
+def _legacy_dirs(api_url, path="", depth=0, max_depth=2, max_total_dirs=15):
+    if depth > max_depth:
+        return []
+    dirs = [path] if path else [""]
+    try:
+        res = requests.get(f"{api_url}/repos/bench/repo/contents/{path}", timeout=2)
+        if res.status_code == 200:
+            for item in res.json():
+                if item.get("type") == "dir":
+                    if len(dirs) >= max_total_dirs:
+                        return dirs
+                    dirs.append(f"{item['path']}/")
+                    dirs.extend(_legacy_dirs(api_url, item["path"], depth + 1, max_depth, max_total_dirs))
+                    if len(dirs) >= max_total_dirs:
+                        return dirs
+    except requests.RequestException:
+        pass
+    return list(set(dirs))
+
+def legacy_fetch_repo_metadata(api_url, raw_url, files_to_check):
+    all_dirs = _legacy_dirs(api_url)
+    found = []
+    for branch in ["main", "master"]:
+        for dir_path in all_dirs:
+            for filenames in files_to_check.values():
+                for filename in filenames:
+                    if filename.startswith(".github") and dir_path:
+                        continue
+                    try:
+                        res = requests.get(f"{raw_url}/bench/repo/{branch}/{dir_path}{filename}", timeout=2)
+                        if res.status_code == 200:
+                            found.append(f"{dir_path}{filename}")
+                    except requests.RequestException:
+                        pass
+        if found:
+            break
+    return found
+
+# --- Runner ---
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dirs", type=int, default=12, help="source directories in the synthetic repo")
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated seconds per request")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    with StubGitHub(synthetic_repo(args.dirs), latency=args.latency) as stub:
+        os.environ["GITHUB_API_URL"] = stub.url
+        os.environ["GITHUB_RAW_URL"] = stub.url
+        from app import github, utils
+        importlib.reload(github)
+        importlib.reload(utils)
+
+        rows = []
+        if not args.skip_legacy:
+            stub.requests = 0
+            legacy_s, legacy_found = _time(lambda: legacy_fetch_repo_metadata(stub.url, stub.url, utils.FILES_TO_CHECK), args.repeat)
+            rows.append(("legacy sequential probes", legacy_s, stub.requests // args.repeat, len(legacy_found)))
+
+        async def new_path():
+            # One event loop for every repeat: the pooled client lives as long as the process does
+            samples = []
+            try:
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    metadata = await utils.fetch_repo_metadata(REPO_URL)
+                    samples.append(time.perf_counter() - start)
+            finally:
+                await github.close_client()
+            return statistics.median(samples), metadata
+
+        stub.requests = 0
+        new_s, metadata = asyncio.run(new_path())
+        rows.append(("async trees API", new_s, stub.requests // args.repeat, len(metadata["found_files"])))
+
+    print(f"{'path':<26}{'wall/audit':>12}{'requests':>10}{'files':>8}")
+    for name, seconds, n_requests, n_files in rows:
+        print(f"{name:<26}{seconds * 1000:>10.1f}ms{n_requests:>10}{n_files:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Search latency over a synthetic audit archive. Seeds --audits rows (shared JD
+and README blobs, a few techs each) into a scratch database, builds the search
+index through migrations.run(), then times /search/-style queries with filters
+and facets.
+
+    python -m benchmarks.bench_search --audits 100000
+    python -m benchmarks.bench_search --audits 1000000 --database-url postgresql://...  # Postgres GIN path
+
+Without --database-url a temporary SQLite file is used (FTS5 index).
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+ROLES = ["Kafka", "React", "Django", "Kubernetes", "PyTorch", "Spark", "Rust", "Go", "Terraform", "GraphQL"]
+TECHS = ["Python", "Go", "TypeScript", "Docker", "Kafka", "PostgreSQL", "Redis", "React", "Rust", "Java", "Spark", "Terraform"]
+WORDS = (
+    "solid clean tested modular pipeline service consumer producer schema migration cache "
+    "latency throughput notebook model training deployment container orchestration queue "
+    "tutorial boilerplate monolith coverage typing docs benchmark observability"
+).split()
+VERDICTS = ["HIRE THIS SPARTAN", "GOOD DEV, WRONG FIT", "TUTORIAL HELL"]
+
+QUERIES = [
+    ("kafka, score > 7", {"q": "kafka", "min_score": 7}),
+    ("kafka consumer", {"q": "kafka consumer"}),
+    ("pytorch + tech filter", {"q": "pytorch training", "techs": ["Python"]}),
+    ("rare term", {"q": "orchestration terraform", "verdict": "HIRE THIS SPARTAN"}),
+]
+
+def _critique(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(40))
+
+def seed(engine, n_audits: int, batch: int = 5000):
+    from app import cache, crud, models
+
+    rng = random.Random(42)
+    jds = {cache.hash_job_description(jd): jd for jd in (f"{role} engineer. " + _critique(rng) for role in ROLES)}
+    readmes = {crud.hash_readme(r): r for r in (f"# Project {i}\n" + _critique(rng) * 5 for i in range(200))}
+    jd_hashes, readme_hashes = list(jds), list(readmes)
+
+    with engine.begin() as conn:
+        conn.execute(models.JobDescriptionBlob.__table__.insert(), [{"hash": h, "body": b} for h, b in jds.items()])
+        conn.execute(models.ReadmeBlob.__table__.insert(), [{"hash": h, "body": b} for h, b in readmes.items()])
+        for start in range(1, n_audits + 1, batch):
+            ids = range(start, min(start + batch, n_audits + 1))
+            audits, techs = [], []
+            for audit_id in ids:
+                audits.append({
+                    "id": audit_id,
+                    "repo_url": f"https://github.com/user{audit_id % 5000}/repo{audit_id}",
+                    "repo_owner": f"user{audit_id % 5000}",
+                    "repo_name": f"repo{audit_id}",
+                    "jd_hash": rng.choice(jd_hashes),
+                    "readme_hash": rng.choice(readme_hashes),
+                    "engineering_score": round(rng.uniform(0, 10), 1),
+                    "critique": _critique(rng),
+                    "verdict": rng.choice(VERDICTS),
+                })
+                for tech in rng.sample(TECHS, 3):
+                    techs.append({"audit_id": audit_id, "name": tech, "name_key": tech.lower()})
+            conn.execute(models.Audit.__table__.insert(), audits)
+            conn.execute(models.AuditTech.__table__.insert(), techs)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audits", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", help="scratch database to seed (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        args.database_url = f"sqlite:///{scratch.name}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from app import migrations, search
+    from app.database import SessionLocal, engine
+
+    try:
+        seed_start = time.perf_counter()
+        migrations.run(engine)
+        seed(engine, args.audits)
+        seeded = time.perf_counter()
+        search.ensure_index(engine)
+        indexed = time.perf_counter()
+        print(f"seeded {args.audits} audits in {seeded - seed_start:.1f}s, indexed in {indexed - seeded:.1f}s ({engine.dialect.name})")
+
+        print(f"{'query':<26}{'p50':>10}{'p95':>10}{'total':>9}")
+        db = SessionLocal()
+        try:
+            for name, params in QUERIES:
+                samples = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    result = search.search_audits(db, **params)
+                    samples.append(time.perf_counter() - start)
+                samples.sort()
+                p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+                print(f"{name:<26}{statistics.median(samples) * 1000:>8.1f}ms{p95 * 1000:>8.1f}ms{result['total']:>9}")
+        finally:
+            db.close()
+    finally:
+        engine.dispose()
+        if scratch:
+            os.remove(scratch.name)
+
+if __name__ == "__main__":
+    main()
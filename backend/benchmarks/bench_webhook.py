@@ -0,0 +1,103 @@
+"""
+GitHub API and LLM calls per push: a push webhook (recon patched from the pushed
+paths, re-score only on artifact/README changes) vs re-auditing the new HEAD from
+scratch. Replays the recorded push payloads in benchmarks/fixtures/ against the
+local stub GitHub server; the LLM is benchmarks.fake_llm.
+
+    python -m benchmarks.bench_webhook
+"""
+import os
+import json
+import glob
+import hmac
+import time
+import hashlib
+import argparse
+import tempfile
+
+from .fake_llm import FakeLLM, install
+from .stub_github import StubGitHub, synthetic_repo
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "push_*.json")
+JD = "Backend engineer, Python and Postgres."
+SECRET = "bench-webhook-secret"
+
+def _wait_job(client, job_id: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/audit/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.02)
+    raise RuntimeError(f"job {job_id} did not finish")
+
+def _audit(client, repo_url: str):
+    job = client.post("/audit/", json={"repo_url": repo_url, "job_description": JD}).json()
+    return _wait_job(client, job["id"])
+
+def _apply(stub: StubGitHub, payload: dict):
+    """Replays a push's file changes onto the stub repo."""
+    for commit in payload["commits"]:
+        stub.files.update(commit["added"])
+        stub.files.difference_update(commit["removed"])
+        if any(path.rsplit("/", 1)[-1].lower().startswith("readme") for path in commit["modified"]):
+            stub.readme += "\nUpdated setup notes.\n"
+    stub.revision += 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    base_files = synthetic_repo()
+    with StubGitHub(base_files, latency=0) as stub:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{scratch.name}",
+            "GITHUB_API_URL": stub.url,
+            "GITHUB_RAW_URL": stub.url,
+            "GITHUB_WEBHOOK_SECRET": SECRET,
+        })
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        llm = install(FakeLLM())
+        rows = []
+        try:
+            with TestClient(app) as client:
+                for i, path in enumerate(sorted(glob.glob(FIXTURES))):
+                    with open(path) as f:
+                        payload = json.load(f)
+                    stub.files, stub.readme = set(base_files), "# Stub repo\n"
+                    stub.revision += 1
+                    repo_url = f"https://github.com/bench/webhook{i}"
+                    _audit(client, repo_url)
+                    before = stub.sha
+                    _apply(stub, payload)
+
+                    # Without the webhook: the next audit of the new HEAD starts from nothing
+                    stub.requests, llm.calls = 0, 0
+                    _audit(client, f"https://github.com/bench/baseline{i}")
+                    full = (stub.requests, llm.calls)
+
+                    payload = {
+                        **payload, "before": before, "after": stub.sha,
+                        "repository": {**payload["repository"], "full_name": f"bench/webhook{i}", "html_url": repo_url},
+                    }
+                    body = json.dumps(payload).encode()
+                    signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+                    stub.requests, llm.calls = 0, 0
+                    result = client.post("/webhooks/github", content=body, headers={
+                        "X-GitHub-Event": "push", "X-Hub-Signature-256": signature, "Content-Type": "application/json",
+                    }).json()
+                    for job_id in result["job_ids"]:
+                        _wait_job(client, job_id)
+                    rows.append((os.path.basename(path), result["status"], stub.requests, full[0], llm.calls, full[1]))
+        finally:
+            os.remove(scratch.name)
+
+    print(f"{'fixture':<26}{'outcome':>10}{'github (hook/full)':>22}{'llm (hook/full)':>18}")
+    for name, status, hook_calls, full_calls, hook_llm, full_llm in rows:
+        print(f"{name:<26}{status:>10}{f'{hook_calls}/{full_calls}':>22}{f'{hook_llm}/{full_llm}':>18}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Stand-in for Gemini in offline benchmarks: answers every prompt with a fixed,
+valid verdict after a configurable delay, so the whole pipeline (prompt build,
+token accounting, JSON extraction, validation) runs without network access.
+"""
+import json
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models import SimpleChatModel
+from langchain_core.messages import BaseMessage
+
+VERDICT = {
+    "engineering_score": 7.5,
+    "match_score": 68,
+    "critique": "Modular services with CI and migrations; tests are thin in places.",
+    "verdict": "HIRE THIS SPARTAN",
+    "tech_stack_inferred": ["Python", "Docker"],
+}
+
+class FakeLLM(SimpleChatModel):
+    """Async callers (astream/abatch) run _call in a worker thread, like the real client's sync path."""
+
+    latency: float = 0.0 # Seconds per call
+    response: str = json.dumps(VERDICT)
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "spartan-fake"
+
+    def _call(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.response
+
+def install(llm: FakeLLM) -> FakeLLM:
+    """Routes service.get_llm() (and the cached audit chain) to the fake."""
+    from app import service
+
+    service.get_llm = lambda: llm
+    service.get_audit_chain.cache_clear()
+    return llm
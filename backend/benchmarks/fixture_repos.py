@@ -0,0 +1,58 @@
+"""
+Repositories served by the stub GitHub server in offline benchmarks.
+tiny and ml-heavy are recorded tree listings + README/raw file bodies
+(fixtures/repos/*.json); the 10k-file monorepo is generated deterministically.
+"""
+import os
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "repos")
+
+@dataclass
+class RepoFixture:
+    name: str
+    files: List[str]
+    readme: str
+    bodies: Dict[str, str] = field(default_factory=dict) # Raw file contents beyond the README
+
+def load(name: str) -> RepoFixture:
+    with open(os.path.join(FIXTURE_DIR, f"{name}.json")) as f:
+        data = json.load(f)
+    return RepoFixture(name=data["name"], files=data["files"], readme=data["readme"], bodies=data.get("bodies", {}))
+
+def monorepo(n_files: int = 10000, seed: int = 7) -> RepoFixture:
+    """
+    Polyglot monorepo: Go/Python/TypeScript services with CI, infra and migrations,
+    plus vendored node_modules that reconnaissance must ignore. Exactly n_files blobs.
+    """
+    rng = random.Random(seed)
+    files = ["README.md", "Makefile", "docker-compose.yml", ".github/workflows/ci.yml", ".github/workflows/deploy.yml",
+             "package.json", "pnpm-lock.yaml", "go.work", "infra/terraform/main.tf", "infra/helm/values.yaml"]
+    layouts = {
+        "go": ["go.mod", "go.sum", "main.go", "Dockerfile"],
+        "py": ["pyproject.toml", "requirements.txt", "app.py", "models.py", "routes.py", "Dockerfile", "migrations/0001_init.py"],
+        "ts": ["package.json", "index.ts", "routes.ts", "controllers.ts", "jest.config.ts", "Dockerfile"],
+    }
+    extensions = {"go": ".go", "py": ".py", "ts": ".ts"}
+    service = 0
+    while len(files) < n_files:
+        lang = rng.choice(sorted(layouts))
+        base = f"services/{lang}-svc{service:03d}"
+        files += [f"{base}/{name}" for name in layouts[lang]]
+        for d in range(rng.randint(2, 6)):
+            files += [f"{base}/internal/pkg{d}/file{i}{extensions[lang]}" for i in range(rng.randint(5, 30))]
+        if lang == "ts":
+            files += [f"{base}/node_modules/dep{i}/index.js" for i in range(rng.randint(10, 60))]
+        service += 1
+    return RepoFixture(
+        name="monorepo",
+        files=files[:n_files],
+        readme="# platform\n\nAll backend services, web apps and infrastructure in one repository.\n\n"
+               + "".join(f"- `services/{lang}-svc{i:03d}`\n" for i, lang in enumerate(["go", "py", "ts"] * 10)),
+    )
+
+def all_fixtures() -> List[RepoFixture]:
+    return [load("tiny"), load("ml-heavy"), monorepo()]
@@ -0,0 +1,144 @@
+import io
+import json
+import hashlib
+import time
+import tarfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+def synthetic_repo(n_dirs: int = 12, files_per_dir: int = 6):
+    """A small full-stack repo: README, Dockerfile, CI, plus n_dirs source directories."""
+    files = ["README.md", "Dockerfile", "docker-compose.yml", ".github/workflows/ci.yml"]
+    for i in range(n_dirs):
+        base = f"service{i}/" if i % 2 else f"service{i}/app/"
+        files.append(f"{base}main.py")
+        files.append(f"{base}requirements.txt")
+        files.extend(f"{base}module{j}.py" for j in range(files_per_dir - 2))
+    return files
+
+class StubGitHub:
+    """
+    Local stand-in for api.github.com + raw.githubusercontent.com serving one repo
+    (any owner/name) from an in-memory file list. Every response is delayed by
+    `latency` seconds to mimic a network round trip, and requests are counted.
+    """
+
+    def __init__(self, files, branch: str = "main", latency: float = 0.002, readme: str = "# Stub repo\n", bodies=None):
+        self.files = set(files)
+        self.branch = branch
+        self.latency = latency
+        self.readme = readme
+        self.bodies = dict(bodies or {})
+        self.revision = 0 # Bump after editing file contents to get a new HEAD SHA
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def sha(self) -> str:
+        """HEAD commit SHA, derived from the file list, README and revision so edits produce a new commit."""
+        state = "\n".join([*sorted(self.files), self.readme, str(self.revision)])
+        return hashlib.sha1(state.encode()).hexdigest()
+
+    def serve(self, fixture):
+        """Switches to another repo (a benchmarks.fixture_repos.RepoFixture); the SHA changes with it."""
+        self.files, self.readme, self.bodies = set(fixture.files), fixture.readme, dict(fixture.bodies)
+        self.revision += 1
+
+    def file_body(self, path: str) -> str:
+        if path in self.bodies:
+            return self.bodies[path]
+        return self.readme if path.rsplit("/", 1)[-1].lower().startswith("readme") else "stub\n"
+
+    def tarball(self, repo: str) -> bytes:
+        """The repo as GitHub serves it from /tarball/{ref}: gzipped, under one <owner>-<repo>-<sha7>/ directory."""
+        buffer = io.BytesIO()
+        root = f"stub-{repo}-{self.sha[:7]}"
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for path in sorted(self.files):
+                data = self.file_body(path).encode()
+                info = tarfile.TarInfo(f"{root}/{path}")
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        return buffer.getvalue()
+
+    def _directories(self):
+        dirs = set()
+        for path in self.files:
+            parts = path.split("/")[:-1]
+            for i in range(1, len(parts) + 1):
+                dirs.add("/".join(parts[:i]))
+        return dirs
+
+    def route(self, path: str, query: str):
+        """Returns (status, body, content_type) for a request path; body is str or bytes."""
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        if parts[0] == "repos" and len(parts) >= 3:
+            rest = parts[3:]
+            if not rest:
+                return 200, json.dumps({"default_branch": self.branch}), "application/json"
+            if rest[0] == "tarball":
+                return 200, self.tarball(parts[2]), "application/x-gzip"
+            if rest[0] == "commits":
+                return 200, self.sha, "text/plain"
+            if rest[0] == "readme":
+                return (200, self.readme, "text/plain") if "README.md" in self.files else (404, "{}", "application/json")
+            if rest[:2] == ["git", "trees"]:
+                tree = [{"path": d, "type": "tree"} for d in sorted(self._directories())]
+                tree += [{"path": f, "type": "blob"} for f in sorted(self.files)]
+                return 200, json.dumps({"tree": tree, "truncated": False}), "application/json"
+            if rest[0] == "contents":
+                prefix = "/".join(rest[1:])
+                prefix = f"{prefix}/" if prefix else ""
+                children = {}
+                for f in self.files:
+                    if f.startswith(prefix):
+                        head = f[len(prefix):].split("/", 1)
+                        children[prefix + head[0]] = "dir" if len(head) > 1 else "file"
+                items = [{"path": p, "type": t} for p, t in sorted(children.items())]
+                return 200, json.dumps(items), "application/json"
+            return 404, "{}", "application/json"
+        # raw.githubusercontent.com/{owner}/{repo}/{branch}/{path}
+        if len(parts) >= 4 and parts[2] in (self.branch, self.sha) and "/".join(parts[3:]) in self.files:
+            return 200, self.file_body("/".join(parts[3:])), "text/plain"
+        return 404, "404: Not Found", "text/plain"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                parsed = urlparse(self.path)
+                status, body, content_type = stub.route(parsed.path, parsed.query)
+                data = body if isinstance(body, bytes) else body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                # Unmetered quota, so the client's token pool never throttles a long benchmark
+                self.send_header("X-RateLimit-Limit", "1000000")
+                self.send_header("X-RateLimit-Remaining", "1000000")
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -0,0 +1,46 @@
+"""
+Production launch: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The schema is initialised once in the master before any worker forks, and the
+reconnaissance / verdict caches are shared across workers through
+SHARED_CACHE_URL (a local SQLite file by default, or redis://...).
+"""
+import os
+import shutil
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Handlers are async and LLM/GitHub bound, so one worker per core is enough;
+# each keeps its own DB pool (DB_POOL_SIZE + DB_MAX_OVERFLOW connections), so
+# size the database's max_connections for workers x that.
+workers = int(os.getenv("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count())))
+
+# Audits stream for a while; give them time to finish on reload/shutdown
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+
+def on_starting(server):
+    os.environ.setdefault("SHARED_CACHE_URL", "sqlite:////tmp/spartan-cache.db")
+    # Workers share their metrics through this directory; counters restart with the server
+    metrics_dir = os.environ.setdefault("METRICS_DIR", "/tmp/spartan-metrics")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    from app import crud, init_db
+    from app.database import SessionLocal, engine
+
+    init_db.main()
+    # Nothing runs yet, so every unfinished job is left over from the last shutdown: release
+    # them all for the workers' first sweep. Workers must not do this themselves, since one
+    # booting next to live workers (a recycle, a reload) would release jobs still running.
+    with SessionLocal() as db:
+        crud.release_unfinished_jobs(db)
+    engine.dispose()
+    # Workers import the app after this; they skip the schema step
+    os.environ["DB_INIT_ON_STARTUP"] = "false"
+    os.environ["RESUME_UNFINISHED_JOBS"] = "false"
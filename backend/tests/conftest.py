@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# app.database reads DATABASE_URL at import time, so it is set before any test imports the app
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="spartan-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
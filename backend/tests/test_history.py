@@ -0,0 +1,43 @@
+import sqlite3
+
+from conftest import DB_PATH
+
+
+def _legacy_database(rows: int):
+    """An audits table as the app created it before migrations, timestamps from CURRENT_TIMESTAMP."""
+    con = sqlite3.connect(DB_PATH)
+    con.execute(
+        "CREATE TABLE audits (id INTEGER PRIMARY KEY, repo_url VARCHAR, job_description TEXT, "
+        "engineering_score FLOAT, match_score FLOAT, critique TEXT, verdict VARCHAR, found_files JSON, "
+        "readme_content TEXT, tech_stack JSON, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    for i in range(rows):
+        con.execute(
+            "INSERT INTO audits (repo_url, engineering_score, critique, verdict, found_files, tech_stack, created_at) "
+            "VALUES (?, 5, 'c', 'TUTORIAL HELL', '[]', '[]', '2026-10-17 01:35:47')",
+            (f"https://github.com/legacy/repo{i}",),
+        )
+    con.commit()
+    con.close()
+
+
+def test_history_pages_through_migrated_rows():
+    _legacy_database(5)
+    from fastapi.testclient import TestClient
+    from app import init_db
+    from app.main import app
+
+    init_db.main()
+    pages, cursor = [], None
+    with TestClient(app) as client:
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/history/", params=params)
+            assert response.status_code == 200
+            body = response.json()
+            pages.append([item["id"] for item in body["items"]])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+            assert len(pages) < 10, "cursor does not advance"
+    assert pages == [[5, 4], [3, 2], [1]]
@@ -2,15 +2,31 @@ import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import styles from './AuditHistory.module.css';
 
+const PAGE_SIZE = 24;
+
 const AuditHistory = ({ apiUrl, onViewAudit }) => {
     const [audits, setAudits] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [verdict, setVerdict] = useState('');
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // History returns slim summaries, one keyset page at a time
+    const fetchPage = async (cursor) => {
+        const params = { limit: PAGE_SIZE };
+        if (cursor) params.cursor = cursor;
+        if (verdict) params.verdict = verdict;
+        const res = await axios.get(`${apiUrl}/history/`, { params });
+        return res.data;
+    };
 
     useEffect(() => {
         const fetchHistory = async () => {
+            setLoading(true);
             try {
-                const res = await axios.get(`${apiUrl}/history/`);
-                setAudits(res.data);
+                const page = await fetchPage(null);
+                setAudits(page.items);
+                setNextCursor(page.next_cursor);
             } catch (err) {
                 console.error("Failed to fetch history", err);
             } finally {
@@ -18,19 +34,51 @@ const AuditHistory = ({ apiUrl, onViewAudit }) => {
             }
         };
         fetchHistory();
-    }, [apiUrl]);
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [apiUrl, verdict]);
+
+    const handleLoadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(nextCursor);
+            setAudits(prev => [...prev, ...page.items]);
+            setNextCursor(page.next_cursor);
+        } catch (err) {
+            console.error("Failed to fetch history", err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    // The full report is only served by /audit/{id}
+    const handleView = async (auditId) => {
+        try {
+            const res = await axios.get(`${apiUrl}/audit/${auditId}`);
+            onViewAudit(res.data);
+        } catch (err) {
+            console.error("Failed to fetch audit", err);
+        }
+    };
 
     if (loading) return <div className={styles.loading}>Loading archives...</div>;
 
     return (
         <div className={styles.container}>
-            <h2 className={styles.title}>Audit Archives</h2>
+            <div className={styles.titleRow}>
+                <h2 className={styles.title}>Audit Archives</h2>
+                <select className={styles.filter} value={verdict} onChange={(e) => setVerdict(e.target.value)}>
+                    <option value="">All verdicts</option>
+                    <option value="HIRE THIS SPARTAN">Hire This Spartan</option>
+                    <option value="GOOD DEV, WRONG FIT">Good Dev, Wrong Fit</option>
+                    <option value="TUTORIAL HELL">Tutorial Hell</option>
+                </select>
+            </div>
             {audits.length === 0 ? (
                 <p className={styles.empty}>No audits recorded yet. Be the first to judge.</p>
             ) : (
                 <div className={styles.grid}>
                     {audits.map(audit => (
-                        <div key={audit.id} className={styles.card} onClick={() => onViewAudit(audit)}>
+                        <div key={audit.id} className={styles.card} onClick={() => handleView(audit.id)}>
                             <div className={styles.cardHeader}>
                                 <span className={styles.repoUrl}>{audit.repo_url.replace('https://github.com/', '')}</span>
                                 <span className={`${styles.badge} ${audit.verdict.includes('HIRE') ? styles.green : styles.red}`}>
@@ -43,6 +91,11 @@ const AuditHistory = ({ apiUrl, onViewAudit }) => {
                     ))}
                 </div>
             )}
+            {nextCursor && (
+                <button className={styles.loadMore} onClick={handleLoadMore} disabled={loadingMore}>
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+            )}
         </div>
     );
 };
@@ -1,30 +1,86 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 import styles from './GenerateAudit.module.css';
+import LiveAudit from './LiveAudit';
+import streamAudit from '../streamAudit';
+
+const POLL_INTERVAL_MS = 1500;
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
 
 const GenerateAudit = ({ apiUrl, onAuditComplete }) => {
     const [repoUrl, setRepoUrl] = useState('');
     const [jobDescription, setJobDescription] = useState('');
     const [forceReaudit, setForceReaudit] = useState(false);
+    const [liveMode, setLiveMode] = useState(true);
+    const [progress, setProgress] = useState(null);
     const [loading, setLoading] = useState(false);
+    const [jobStatus, setJobStatus] = useState('');
     const [error, setError] = useState('');
 
+    const runLiveAudit = async (payload) => {
+        let audit = null;
+        setProgress({ phases: [], files: [], text: '' });
+        await streamAudit(`${apiUrl}/audit/stream`, payload, (event, data) => {
+            if (event === 'phase') {
+                // A new LLM attempt restarts the streamed answer
+                const text = data.phase === 'llm' ? '' : undefined;
+                setProgress(prev => ({ ...prev, phases: [...prev.phases, data], text: text ?? prev.text }));
+            } else if (event === 'files') {
+                setProgress(prev => ({ ...prev, files: [...prev.files, data] }));
+            } else if (event === 'token') {
+                setProgress(prev => ({ ...prev, text: prev.text + data.text }));
+            } else if (event === 'verdict') {
+                audit = data;
+            } else if (event === 'error') {
+                throw new Error(data.detail);
+            }
+        });
+        if (!audit) throw new Error('Audit stream ended without a verdict.');
+        onAuditComplete(audit);
+    };
+
     const handleSubmit = async (e) => {
         e.preventDefault();
         setLoading(true);
         setError('');
 
+        if (liveMode) {
+            try {
+                await runLiveAudit({
+                    repo_url: repoUrl,
+                    job_description: jobDescription || null,
+                    force_reaudit: forceReaudit
+                });
+            } catch (err) {
+                setError(err.message || 'Failed to generate audit. Ensure the repo is public.');
+            } finally {
+                setLoading(false);
+            }
+            return;
+        }
+
         try {
-            const response = await axios.post(`${apiUrl}/audit/`, {
+            // The backend queues the audit and hands back a job to poll
+            let { data: job } = await axios.post(`${apiUrl}/audit/`, {
                 repo_url: repoUrl,
                 job_description: jobDescription || null,
                 force_reaudit: forceReaudit
             });
-            onAuditComplete(response.data);
+            while (job.status === 'queued' || job.status === 'running') {
+                setJobStatus(job.status);
+                await sleep(POLL_INTERVAL_MS);
+                ({ data: job } = await axios.get(`${apiUrl}/audit/jobs/${job.id}`));
+            }
+            if (job.status === 'failed') {
+                setError(job.error || 'Failed to generate audit. Ensure the repo is public.');
+            } else {
+                onAuditComplete(job.audit);
+            }
         } catch (err) {
             setError(err.response?.data?.detail || 'Failed to generate audit. Ensure the repo is public.');
         } finally {
             setLoading(false);
+            setJobStatus('');
         }
     };
 
@@ -68,6 +124,14 @@ const GenerateAudit = ({ apiUrl, onAuditComplete }) => {
                         />
                         Force Re-audit (bypass cache)
                     </label>
+                    <label>
+                        <input
+                            type="checkbox"
+                            checked={liveMode}
+                            onChange={(e) => setLiveMode(e.target.checked)}
+                        />
+                        Live Mode (stream progress as it happens)
+                    </label>
                 </div>
 
                 <div className={styles.disclaimer}>
@@ -84,10 +148,12 @@ const GenerateAudit = ({ apiUrl, onAuditComplete }) => {
                 {error && <div className={styles.error}>{error}</div>}
 
                 <button type="submit" className={styles.submitButton} disabled={loading}>
-                    <span className={styles.buttonText}>{loading ? 'RUNNING RECON...' : 'EXECUTE AUDIT'}</span>
+                    <span className={styles.buttonText}>{loading ? (jobStatus === 'queued' ? 'QUEUED...' : 'RUNNING RECON...') : 'EXECUTE AUDIT'}</span>
                     <div className={loading ? styles.loadingBarActive : styles.loadingBar}></div>
                 </button>
             </form>
+
+            {liveMode && loading && progress && <LiveAudit progress={progress} />}
         </div>
     );
 };
@@ -0,0 +1,73 @@
+import React from 'react';
+import styles from './LiveAudit.module.css';
+
+const CATEGORY_LABELS = {
+    readme: 'README',
+    infra: 'Infrastructure',
+    stack: 'Dependency Manifests',
+    tests: 'Testing',
+    ml_artifacts: 'ML Artifacts',
+    source_code: 'Source Code Proof'
+};
+
+// Pulls a (possibly still incomplete) field out of the JSON the LLM is streaming
+const partialField = (text, key) => {
+    const number = text.match(new RegExp(`"${key}"\\s*:\\s*(-?[\\d.]+)`));
+    if (number) return number[1];
+    const string = text.match(new RegExp(`"${key}"\\s*:\\s*"((?:[^"\\\\]|\\\\.)*)`));
+    return string ? string[1].replace(/\\"/g, '"').replace(/\\n/g, '\n') : null;
+};
+
+const describePhase = (phase) => {
+    switch (phase.phase) {
+        case 'resolve': return `Resolved ${phase.branch} @ ${phase.commit_sha.slice(0, 7)}`;
+        case 'tree': return `Walked ${phase.directories} directories, ${phase.files} files${phase.truncated ? ' (tree truncated)' : ''}`;
+        case 'readme': return phase.path ? `README fetched: ${phase.path} (${phase.chars} chars)` : 'No README found';
+        case 'llm': return phase.attempt > 1 ? `Unparseable answer, retrying (attempt ${phase.attempt})...` : 'Cynical Staff Engineer is reviewing...';
+        default: return phase.phase;
+    }
+};
+
+const LiveAudit = ({ progress }) => {
+    const { phases, files, text } = progress;
+    const score = partialField(text, 'engineering_score');
+    const match = partialField(text, 'match_score');
+    const verdict = partialField(text, 'verdict');
+    const critique = partialField(text, 'critique');
+
+    return (
+        <div className={styles.container}>
+            <h3 className={styles.heading}>Live Reconnaissance</h3>
+            <ul className={styles.phases}>
+                {phases.map((phase, i) => <li key={i}>{describePhase(phase)}</li>)}
+            </ul>
+
+            {files.length > 0 && (
+                <div className={styles.categories}>
+                    {files.map(cat => (
+                        <div key={cat.category} className={styles.category}>
+                            <span className={styles.categoryLabel}>{CATEGORY_LABELS[cat.category] || cat.category}</span>
+                            <span className={styles.categoryCount}>{cat.count}</span>
+                            <div className={styles.paths}>
+                                {cat.paths.map(path => <span key={path} className={styles.path}>{path}</span>)}
+                            </div>
+                        </div>
+                    ))}
+                </div>
+            )}
+
+            {text && (
+                <div className={styles.partialReport}>
+                    {verdict && <h4 className={styles.verdict}>{verdict}</h4>}
+                    <div className={styles.scores}>
+                        {score && <span>Engineering: {score}/10</span>}
+                        {match && <span>Match: {match}%</span>}
+                    </div>
+                    {critique && <p className={styles.critique}>{critique}<span className={styles.cursor}>▌</span></p>}
+                </div>
+            )}
+        </div>
+    );
+};
+
+export default LiveAudit;